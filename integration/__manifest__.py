@@ -26,6 +26,7 @@
         'data/queue_job_channel_data.xml',
         'data/queue_job_function_data.xml',
         'data/ir_config_parameter_data.xml',
+        'data/ir_cron_data.xml',
 
         # Wizard
         'wizard/import_customers_wizard.xml',
@@ -113,6 +113,13 @@ class AbsApiClient(with_metaclass(ABCMeta)):
     def get_product_template_ids(self):
         return
 
+    def iter_product_template_ids(self):
+        """
+        Yield product template ids block by block. Redefine it when the external system
+        allows to read them by pages, so the whole list is never kept in memory.
+        """
+        yield self.get_product_template_ids()
+
     @abstractmethod
     def get_product_templates(self):
         return
@@ -195,6 +202,12 @@ class AbsApiClient(with_metaclass(ABCMeta)):
 
     @abstractmethod
     def export_images(self, images):
+        """
+        :param images: template and variants images, `images['exported']` contains
+            the images exported before as {checksum: external_image_id}
+        :return: exported images {checksum: external_image_id} or None when the
+            adapter doesn't track them
+        """
         return
 
     @abstractmethod
@@ -246,6 +259,13 @@ class AbsApiClient(with_metaclass(ABCMeta)):
     def get_stock_levels(self):
         return
 
+    def iter_stock_levels(self):
+        """
+        Yield dictionaries {variant_code: qty} block by block.
+        Redefine it when the external system allows to read stock levels by pages.
+        """
+        yield self.get_stock_levels()
+
     @abstractmethod
     def get_products_for_accessories(self):
         return
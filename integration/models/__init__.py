@@ -19,6 +19,7 @@ from . import product_feature_value
 from . import product_template_feature_line
 from . import product_public_category
 from . import integration_webhook_line
+from . import integration_inventory_dirty
 from . import sale_integration
 from . import sale_integration_api_field
 from . import sale_integration_file
@@ -39,6 +40,7 @@ from . import account_tax
 from . import sale_order_payment_method
 from . import mrp_bom
 from . import mrp_bom_line
+from . import integration_kit_component
 from . import queue_job
 
 from . import template_converter
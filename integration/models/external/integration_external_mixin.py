@@ -6,6 +6,8 @@ from odoo.exceptions import UserError
 from odoo.osv import expression
 from odoo.tools.sql import escape_psql
 
+from collections import defaultdict
+
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -16,6 +18,8 @@ RESULT_MAPPED = 3
 RESULT_EXISTS = 4
 RESULT_NOT_IN_EXTERNAL = 5
 
+IMPORT_BATCH_SIZE = 1000
+
 
 class IntegrationExternalMixin(models.AbstractModel):
     _name = 'integration.external.mixin'
@@ -67,26 +71,30 @@ class IntegrationExternalMixin(models.AbstractModel):
         return self.env[f'integration.{self._odoo_model}.mapping']
 
     def write(self, vals):
+        # Mapping index of the mapping models is keyed by external code
+        index_changed = 'code' in vals and any(x.code != vals['code'] for x in self)
         result = super().write(vals)
+        if index_changed:
+            self.mapping_model._mapping_index_changed()
         self.requeue_jobs_if_needed()
         return result
 
-    @api.model
-    def create(self, vals):
-        result = super().create(vals)
+    def unlink(self):
+        result = super().unlink()
+        self.mapping_model._mapping_index_changed()
+        return result
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        result = super().create(vals_list)
         result.requeue_jobs_if_needed()
         return result
 
     def requeue_jobs_if_needed(self):
-        QueueJob = self.env['queue.job']
-
-        for external in self:
-            if external.external_reference:
-                QueueJob.requeue_integration_jobs(
-                    'NoExternal',
-                    external._name,
-                    external.code,
-                )
+        codes = self.filtered('external_reference').mapped('code')
+
+        if codes:
+            self.env['queue.job'].requeue_integration_jobs('NoExternal', self._name, codes)
 
     @api.model
     def create_or_update(self, vals):
@@ -101,6 +109,56 @@ class IntegrationExternalMixin(models.AbstractModel):
             return record
         return self.create(vals)
 
+    @api.model
+    def create_or_update_multi(self, vals_list):
+        """
+        Bulk version of `create_or_update()` for the values of one integration.
+
+        Existing records are fetched with a single query, new records are created
+        by batches and existing ones are written only if their name or reference
+        were changed. Returns records in the order of `vals_list`.
+        """
+        if not vals_list:
+            return self
+
+        integration_ids = {x['integration_id'] for x in vals_list}
+        assert len(integration_ids) == 1, 'Values should belong to one integration'
+
+        existing = self.search([
+            ('integration_id', 'in', list(integration_ids)),
+            ('code', 'in', list({x['code'] for x in vals_list})),
+        ])
+        record_by_code = {x.code: x for x in existing}
+
+        # The last values win if the same code is received several times
+        vals_by_code = {x['code']: x for x in vals_list}
+
+        vals_to_create = []
+        for code, vals in vals_by_code.items():
+            record = record_by_code.get(code)
+
+            if not record:
+                vals_to_create.append(vals)
+                continue
+
+            vals_to_write = {
+                field_name: vals[field_name]
+                for field_name in self._get_import_update_fields()
+                if field_name in vals and (record[field_name] or False) != (vals[field_name] or False)
+            }
+            if vals_to_write:
+                record.write(vals_to_write)
+
+        for index in range(0, len(vals_to_create), IMPORT_BATCH_SIZE):
+            created = self.create(vals_to_create[index:index + IMPORT_BATCH_SIZE])
+            record_by_code.update({x.code: x for x in created})
+
+        return self.browse([record_by_code[x['code']].id for x in vals_list])
+
+    @api.model
+    def _get_import_update_fields(self):
+        return ['name', 'external_reference']
+
     def name_get(self):
         result = []
         for rec in self:
@@ -296,62 +354,111 @@ class IntegrationExternalMixin(models.AbstractModel):
         """It's a hook method for redefining."""
         pass
 
+    def _post_import_external_batch(self, adapter_external_records):
+        """
+        Hook method receiving the whole imported batch, records of `self` are in
+        the order of `adapter_external_records`. Calls `_post_import_external_one()`
+        for every record by default.
+        """
+        for record, adapter_external_record in zip(self, adapter_external_records):
+            record._post_import_external_one(adapter_external_record)
+
     @api.model
-    def _fix_unmapped_element(self, integration, element):
-        # element - 'attribute' or 'feature'
+    def _fix_unmapped_element(self, integration, element, external_values=None):
+        """
+        Map the unmapped attribute/feature values to the Odoo values with the same name.
+        Everything needed is loaded at once and the mappings are resolved in one pass.
+
+        element - 'attribute' or 'feature'
+        external_values - already fetched adapter data (to avoid re-downloading it)
+        """
         ElementValueMapping = self.env[f'integration.product.{element}.value.mapping']
         ExternalElement = self.env[f'integration.product.{element}.external']
         MappingElement = self.env[f'integration.product.{element}.mapping']
         ElementValue = self.env[f'product.{element}.value']
 
-        external_values = getattr(integration._build_adapter(), f'get_{element}_values')()
+        # 1. Unmapped "Product Attribute/Feature Value Mapping"
+        mapped_element_values = ElementValueMapping.search([
+            ('integration_id', '=', integration.id),
+            (element + '_value_id', '=', False),
+            (f'external_{element}_value_id', '!=', False),
+        ])
+
+        if not mapped_element_values:
+            return
+
+        if external_values is None:
+            external_values = getattr(integration._build_adapter(), f'get_{element}_values')()
 
         external_values_by_id = {
             x['id']: x['id_group'] for x in external_values
         }
 
-        # 1. Try to find unmapped "Product Attribute/Feature Value Mapping"
-        mapped_element_values = ElementValueMapping.search([
+        # 2. "Product Attribute/Feature External" by Code (External ID)
+        external_element_by_code = {
+            x.code: x.id for x in ExternalElement.search([
+                ('integration_id', '=', integration.id),
+            ])
+        }
+
+        # 3. "Product Attribute/Feature" by "Product Attribute/Feature External"
+        element_ids_by_external = defaultdict(set)
+        for element_mapping in MappingElement.search([
             ('integration_id', '=', integration.id),
-            (element + '_value_id', '=', False),
-        ])
+            (f'{element}_id', '!=', False),
+        ]):
+            external_element_id = getattr(element_mapping, f'external_{element}_id').id
+            element_ids_by_external[external_element_id].add(
+                getattr(element_mapping, f'{element}_id').id
+            )
+
+        # 4. "Product Attribute/Feature Value" by Attribute/Feature and normalised name
+        element_ids = {
+            list(x)[0] for x in element_ids_by_external.values() if len(x) == 1
+        }
+        value_ids_by_name = defaultdict(list)
+        for value in ElementValue.search([(f'{element}_id', 'in', list(element_ids))]):
+            key = (getattr(value, f'{element}_id').id, self._normalise_name(value.name))
+            value_ids_by_name[key].append(value.id)
 
+        # 5. Resolve all the mappings
+        resolved = []
         for mapped_element_value in mapped_element_values:
-            # 2. Get "Product Attribute/Feature Value External"
             external_element_value = getattr(mapped_element_value, f'external_{element}_value_id')
 
-            if not external_element_value:
-                continue
+            external_element_code = external_values_by_id.get(external_element_value.code)
+            external_element_id = external_element_by_code.get(external_element_code)
 
-            external_element_code = external_values_by_id.get(external_element_value.code, None)
+            odoo_element_ids = element_ids_by_external.get(external_element_id)
+            if not odoo_element_ids or len(odoo_element_ids) != 1:
+                continue
 
-            # 3. Get "Product Attribute/Feature External" by Code (External ID)
-            external_element = ExternalElement.search([
-                ('integration_id', '=', integration.id),
-                ('code', '=', external_element_code)
-            ])
+            key = (list(odoo_element_ids)[0], self._normalise_name(external_element_value.name))
+            value_ids = value_ids_by_name.get(key)
 
-            if not external_element:
-                continue
+            if value_ids and len(value_ids) == 1:
+                resolved.append((mapped_element_value.id, value_ids[0]))
 
-            # 4. Get by mapping "Product Attribute/Feature" by Code (External ID)
-            value = MappingElement.search([
-                ('integration_id', '=', integration.id),
-                (f'external_{element}_id', '=', external_element.id),
-            ]).mapped(f'{element}_id')
+        if not resolved:
+            return
 
-            if not value or len(value) != 1:
-                continue
+        # 6. Set attribute_value_id or feature_value_id with a single query
+        ElementValueMapping.flush_model()
+        self.env.cr.execute(f'''
+            UPDATE {ElementValueMapping._table} AS m
+            SET {element}_value_id = v.value_id, write_date = %s, write_uid = %s
+            FROM (VALUES {', '.join(['%s'] * len(resolved))}) AS v(mapping_id, value_id)
+            WHERE m.id = v.mapping_id
+        ''', [fields.Datetime.now(), self.env.uid] + resolved)
 
-            # 5. Get "Product Attribute/Feature Value" by Name
-            product_element_value = ElementValue.search([
-                (f'{element}_id', '=', value.id),
-                ('name', '=ilike', escape_psql(external_element_value.name)),
-            ])
+        mappings = ElementValueMapping.browse([x[0] for x in resolved])
+        mappings.invalidate_recordset()
+        ElementValueMapping._mapping_index_changed()
+        mappings.requeue_jobs_if_needed()
 
-            if product_element_value and len(product_element_value) == 1:
-                # 6. Set attribute_value_id or feature_value_id
-                setattr(mapped_element_value, element + '_value_id', product_element_value)
+    @staticmethod
+    def _normalise_name(name):
+        return (name or '').strip().lower()
 
     def _post_import_external_element(self, adapter_external_record, element):
         """
@@ -382,109 +489,224 @@ class IntegrationExternalMixin(models.AbstractModel):
         # 3. Set external_attribute_id or external_feature_id
         setattr(self, f'external_{element}_id', external_element.id)
 
+    def _post_import_external_element_batch(self, adapter_external_records, element):
+        """
+        Bulk version of `_post_import_external_element()`: all external attributes/features
+        are fetched with a single query and the values are linked with one write per
+        attribute/feature.
+        """
+        if not self:
+            return
+
+        element_codes = []
+        for adapter_external_record in adapter_external_records:
+            element_code = adapter_external_record.get('id_group')
+            if not element_code:
+                raise UserError(_('External %s Value should have "%s" field.') % (
+                    element.capitalize(), 'id_group'
+                ))
+            element_codes.append(element_code)
+
+        external_elements = self.env[f'integration.product.{element}.external'].search([
+            ('code', 'in', list(set(element_codes))),
+            ('integration_id', '=', self.integration_id.id),
+        ])
+        external_element_by_code = {x.code: x for x in external_elements}
+
+        records_by_element = defaultdict(lambda: self.browse())
+        for record, element_code in zip(self, element_codes):
+            external_element = external_element_by_code.get(element_code)
+
+            if not external_element:
+                raise UserError(
+                    _('No External Product %s found with code %s. Maybe %ss are not '
+                      'exported yet?') % (element.capitalize(), element_code, element)
+                )
+
+            records_by_element[external_element] |= record
+
+        for external_element, records in records_by_element.items():
+            records.write({f'external_{element}_id': external_element.id})
+
     def _import_elements_and_values(self, ext_element, ext_values, element):
-        result = {'element': 0, 'values': {
-            RESULT_ALREADY_MAPPED: 0, RESULT_MAPPED: 0, RESULT_CREATED: 0}}
+        self.ensure_one()
+        results = self._import_elements_and_values_batch(
+            [(self, ext_element, ext_values)],
+            element,
+        )
+        return results[self.id]
+
+    def _import_elements_and_values_batch(self, items, element):
+        """
+        Import attributes/features with their values at once.
+
+        items - [(external element, external system element, [external system values])]
+                of the same integration
+        Returns {external element id: result}, where result has the same structure as
+        the result of `_import_elements_and_values()`.
+        """
         MappingProductElement = self.env[f'integration.product.{element}.mapping']
         MappingProductElementValue = self.env[f'integration.product.{element}.value.mapping']
         ExternalProductElementValue = self.env[f'integration.product.{element}.value.external']
         ProductElement = self.env[f'product.{element}']
         ProductElementValue = self.env[f'product.{element}.value']
 
-        # 1. Checks before creating
-        element_mapping = MappingProductElement.get_mapping(self.integration_id, self.code)
+        results = {}
+        if not items:
+            return results
 
-        element_record = None
-        # 1.1. Check that attribute/feature already mapped
-        if element_mapping:
-            element_record = getattr(element_mapping, f'{element}_id')
+        integration = items[0][0].integration_id
+        external_elements = self.browse([x[0].id for x in items])
 
-        odoo_object = ProductElement.search([('name', '=ilike', escape_psql(self.name))])
+        # 1. Checks before creating
+        # 1.1. Attributes/features which are already mapped
+        element_by_external = {
+            getattr(x, f'external_{element}_id').id: getattr(x, f'{element}_id')
+            for x in MappingProductElement.search([
+                ('integration_id', '=', integration.id),
+                (f'external_{element}_id', 'in', external_elements.ids),
+                (f'{element}_id', '!=', False),
+            ])
+        }
 
-        # 1.2. Check by Name that attribute/feature already exists in Odoo
-        if odoo_object and not element_record:
-            result['element'] = RESULT_EXISTS
-            return result
+        # 1.2. Attributes/features which already exist in Odoo by Name
+        existing_element_names = {
+            self._normalise_name(x.name) for x in ProductElement.search([])
+        }
 
-        # 2. Create Product Attribute/Feature (if it is not already created)
-        if element_record:
-            result['element'] = RESULT_ALREADY_MAPPED
-        else:
-            element_record = self.create_or_update_with_translation(
-                integration=self.integration_id,
-                odoo_object=ProductElement,
-                vals={'name': ext_element['name']},
-            )
+        # 2. Create Product Attributes/Features (if they are not already created)
+        values_by_element = []
+        for external_element, ext_element, ext_values in items:
+            result = {'element': 0, 'values': {
+                RESULT_ALREADY_MAPPED: 0, RESULT_MAPPED: 0, RESULT_CREATED: 0}}
+            results[external_element.id] = result
 
-            # Create mapping for new attribute
-            MappingProductElement.create_or_update_mapping(
-                self.integration_id,
-                element_record,
-                self,
-            )
+            element_record = element_by_external.get(external_element.id)
 
-            result['element'] = RESULT_CREATED
+            if element_record:
+                result['element'] = RESULT_ALREADY_MAPPED
+            elif self._normalise_name(external_element.name) in existing_element_names:
+                result['element'] = RESULT_EXISTS
+                continue
+            else:
+                element_record = self.create_or_update_with_translation(
+                    integration=integration,
+                    odoo_object=ProductElement,
+                    vals={'name': ext_element['name']},
+                )
 
-        # 3. Create Product Attribute/Feature Values
-        for ext_value in ext_values:
-            # 4. Checks before creating
-            element_value_mapping = \
-                MappingProductElementValue.get_mapping(self.integration_id, ext_value['id'])
+                # Create mapping for new attribute
+                MappingProductElement.create_or_update_mapping(
+                    integration,
+                    element_record,
+                    external_element,
+                )
+                existing_element_names.add(self._normalise_name(external_element.name))
 
-            element_value = None
-            # 4.1. Check that attribute already mapped
-            if element_value_mapping:
-                element_value = getattr(element_value_mapping, f'{element}_value_id')
+                result['element'] = RESULT_CREATED
 
-            if element_value:
-                result['values'][RESULT_ALREADY_MAPPED] += 1
-                continue
+            values_by_element.append((element_record, ext_values, result))
 
-            # 5. Try to find "Product Attribute/Feature Value" by Name or create
-            name = ext_value['name']
-            if isinstance(name, dict) and name.get('language'):
-                name = self.get_original_name(name)
+        # 3. Load values mappings, external values and Odoo values at once
+        codes = list({
+            ext_value['id']
+            for __, ext_values, __ in values_by_element
+            for ext_value in ext_values
+        })
 
-            element_value = ProductElementValue.search([
-                (f'{element}_id', '=', element_record.id),
-                ('name', '=ilike', escape_psql(name)),
+        external_value_by_code = {
+            x.code: x for x in ExternalProductElementValue.search([
+                ('integration_id', '=', integration.id),
+                ('code', 'in', codes),
             ])
+        }
 
-            if element_value:
-                result['values'][RESULT_MAPPED] += 1
-            else:
-                element_value = self.create_or_update_with_translation(
-                    integration=self.integration_id,
-                    odoo_object=ProductElementValue,
-                    vals={
+        mapping_by_external = {
+            getattr(x, f'external_{element}_value_id').id: x
+            for x in MappingProductElementValue.search([
+                ('integration_id', '=', integration.id),
+                (f'external_{element}_value_id', 'in',
+                 [x.id for x in external_value_by_code.values()]),
+            ])
+        }
+
+        value_by_name = {}
+        for value in ProductElementValue.search([
+            (f'{element}_id', 'in', [x[0].id for x in values_by_element]),
+        ]):
+            key = (getattr(value, f'{element}_id').id, self._normalise_name(value.name))
+            value_by_name.setdefault(key, value)
+
+        # 4. Resolve Product Attribute/Feature Values by mapping or by Name
+        value_keys = []  # [(code, key of the value)]
+        vals_to_create = {}
+        for element_record, ext_values, result in values_by_element:
+            for ext_value in ext_values:
+                external_value = external_value_by_code.get(ext_value['id'])
+                mapping = external_value and mapping_by_external.get(external_value.id)
+
+                if mapping and getattr(mapping, f'{element}_value_id'):
+                    result['values'][RESULT_ALREADY_MAPPED] += 1
+                    continue
+
+                name = ext_value['name']
+                if isinstance(name, dict) and name.get('language'):
+                    name = self.get_original_name(name, integration)
+
+                key = (element_record.id, self._normalise_name(name))
+
+                if key in value_by_name or key in vals_to_create:
+                    result['values'][RESULT_MAPPED] += 1
+                else:
+                    vals_to_create[key] = {
                         'name': name,
                         f'{element}_id': element_record.id,
-                    },
-                )
-                result['values'][RESULT_CREATED] += 1
-
-            # 6.  Get external record and if it doesn't exists create it
-            external_value = ExternalProductElementValue.get_external_by_code(
-                self.integration_id,
-                ext_value['id'],
-                raise_error=False,
-            )
+                    }
+                    result['values'][RESULT_CREATED] += 1
+
+                value_keys.append((ext_value['id'], key))
+
+        # 5. Create the missing Product Attribute/Feature Values
+        if vals_to_create:
+            created_values = ProductElementValue.create(list(vals_to_create.values()))
+            value_by_name.update(zip(vals_to_create.keys(), created_values))
+
+        # 6. Create the missing external records
+        new_external_vals = {}
+        for code, key in value_keys:
+            if code not in external_value_by_code:
+                new_external_vals[code] = {
+                    'code': code,
+                    'name': value_by_name[key].name,
+                    'integration_id': integration.id,
+                }
 
-            if not external_value:
-                external_value = ExternalProductElementValue.create({
-                    'code': ext_value['id'],
-                    'name': element_value.name,
-                    'integration_id': self.integration_id.id,
+        if new_external_vals:
+            external_value_by_code.update({
+                x.code: x
+                for x in ExternalProductElementValue.create(list(new_external_vals.values()))
+            })
+
+        # 7. Create mappings for new product attribute/feature values
+        mappings_vals = []
+        for code, key in dict(value_keys).items():
+            external_value = external_value_by_code[code]
+            element_value = value_by_name[key]
+            mapping = mapping_by_external.get(external_value.id)
+
+            if mapping:
+                mapping.write({f'{element}_value_id': element_value.id})
+            else:
+                mappings_vals.append({
+                    'integration_id': integration.id,
+                    f'external_{element}_value_id': external_value.id,
+                    f'{element}_value_id': element_value.id,
                 })
 
-            # 7. Create mapping for new product attribute/feature value
-            MappingProductElementValue.create_or_update_mapping(
-                self.integration_id,
-                element_value,
-                external_value,
-            )
+        if mappings_vals:
+            MappingProductElementValue.create(mappings_vals)
 
-        return result
+        return results
 
     def _run_import_elements_element(self, element):
         res_element = {}
@@ -530,18 +752,21 @@ class IntegrationExternalMixin(models.AbstractModel):
                 if ext_value['id_group'] in elements_dict:
                     elements_dict[ext_value['id_group']]['ext_values'] += [ext_value]
 
-            # Run through the attributes and try to import them
+            # Import all the attributes found in the External System at once
+            results = self._import_elements_and_values_batch(
+                [
+                    (item['external_element'], item['ext_elements'], item['ext_values'])
+                    for item in elements_dict.values() if item['ext_elements']
+                ],
+                element,
+            )
+
             for key, item in elements_dict.items():
                 external_element = item['external_element']
 
-                if not item['ext_elements']:
+                result = results.get(external_element.id)
+                if not result:
                     result = {'element': RESULT_NOT_IN_EXTERNAL, 'values': {}}
-                else:
-                    result = external_element._import_elements_and_values(
-                        item['ext_elements'],
-                        item['ext_values'],
-                        element,
-                    )
 
                 if result['element'] in (RESULT_ALREADY_MAPPED, RESULT_CREATED):
                     res_element[result['element']] = res_element.get(result['element'], 0) + 1
@@ -21,7 +21,10 @@ class IntegrationProductAttributeValueExternal(models.Model):
     )
 
     def _fix_unmapped(self, adapter_external_data):
-        self._fix_unmapped_element(self.integration_id, 'attribute')
+        self._fix_unmapped_element(self.integration_id, 'attribute', adapter_external_data)
 
     def _post_import_external_one(self, adapter_external_record):
         self._post_import_external_element(adapter_external_record, 'attribute')
+
+    def _post_import_external_batch(self, adapter_external_records):
+        self._post_import_external_element_batch(adapter_external_records, 'attribute')
@@ -21,11 +21,14 @@ class IntegrationProductFeatureValueExternal(models.Model):
     )
 
     def _fix_unmapped(self, adapter_external_data):
-        self._fix_unmapped_element(self.integration_id, 'feature')
+        self._fix_unmapped_element(self.integration_id, 'feature', adapter_external_data)
 
     def _post_import_external_one(self, adapter_external_record):
         self._post_import_external_element(adapter_external_record, 'feature')
 
+    def _post_import_external_batch(self, adapter_external_records):
+        self._post_import_external_element_batch(adapter_external_records, 'feature')
+
     def _pre_import_external_check(self, external_record, integration):
         """
         This method will check possibility to import Feature Value
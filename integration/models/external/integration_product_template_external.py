@@ -8,6 +8,7 @@ from odoo.tools.image import IMAGE_MAX_RESOLUTION
 from odoo.tools.sql import escape_psql
 
 import base64
+import json
 import logging
 from io import BytesIO
 from collections import defaultdict
@@ -30,6 +31,22 @@ class IntegrationProductTemplateExternal(models.Model):
         readonly=True,
     )
 
+    exported_images = fields.Text(
+        string='Exported Images',
+        help='JSON with checksums of the exported images and their external ids '
+             '{checksum: external_image_id}. The first image is the cover one.',
+        readonly=True,
+        copy=False,
+    )
+
+    def get_exported_images(self):
+        self.ensure_one()
+        return json.loads(self.exported_images or '{}')
+
+    def set_exported_images(self, exported_images):
+        self.ensure_one()
+        self.exported_images = json.dumps(exported_images)
+
     def run_import_products(self, import_images=False):
         for external_template in self:
             integration = external_template.integration_id
@@ -228,6 +245,7 @@ class IntegrationProductTemplateExternal(models.Model):
         ProductAttributeValue = self.env['product.attribute.value']
         ProductFeature = self.env['product.feature']
         ProductFeatureValue = self.env['product.feature.value']
+        ProductImage = self.env['product.image'].with_context(skip_product_export=True)
 
         upd_template = {
             'name': ext_template.get('name', False),
@@ -321,29 +339,17 @@ class IntegrationProductTemplateExternal(models.Model):
         if ext_template.get('barcode') and ext_template['barcode'] != IS_FALSE:
             upd_template['barcode'] = ext_template['barcode']
 
-        # Create images
-        if ext_images['images']:
-            upd_template['product_template_image_ids'] = []
-
-            for bin_data in ext_images['images'].values():
-                # verify image size
-                img = Image.open(BytesIO(bin_data))
-                w, h = img.size
-                if w * h > IMAGE_MAX_RESOLUTION:
-                    continue
-
-                b64_image = base64.b64encode(bin_data)
-
-                if not upd_template.get('image_1920'):
-                    upd_template['image_1920'] = b64_image
-                else:
-                    upd_template['product_template_image_ids'].append((0, 0, {
-                        'name': upd_template['name'],
-                        'image_1920': b64_image,
-                    }))
+        # Create images. Extra images are attached one by one after the template is saved,
+        # so only a single image content is kept in memory at a time
+        extra_images = []
+        for image in ext_images['images'].values():
+            if not self._is_image_size_allowed(image):
+                continue
 
-            if not upd_template['product_template_image_ids']:
-                upd_template.pop('product_template_image_ids')
+            if not upd_template.get('image_1920'):
+                upd_template['image_1920'] = self._get_image_base64(image)
+            else:
+                extra_images.append(image)
 
         # Create Features
         for feature_line in ext_template.get('product_features', []):
@@ -382,7 +388,7 @@ class IntegrationProductTemplateExternal(models.Model):
             )
         else:
             # remove existing product image's
-            if upd_template.get('product_template_image_ids'):
+            if extra_images:
                 template.product_template_image_ids.unlink()
 
             template = self.create_or_update_with_translation(
@@ -404,10 +410,36 @@ class IntegrationProductTemplateExternal(models.Model):
                         'value_ids': [(6, 0, value_ids)],
                     })]
 
+        for image in extra_images:
+            ProductImage.create({
+                'name': template.name,
+                'image_1920': self._get_image_base64(image),
+                'product_tmpl_id': template.id,
+            })
+
         template.create_or_update_mapping(integration, template, self)
 
         return template
 
+    @staticmethod
+    def _read_image(image):
+        """Image is either binary content or path to the downloaded file"""
+        if isinstance(image, bytes):
+            return image
+
+        with open(image, 'rb') as f:
+            return f.read()
+
+    def _get_image_base64(self, image):
+        return base64.b64encode(self._read_image(image))
+
+    @staticmethod
+    def _is_image_size_allowed(image):
+        # Only the image header is read to get the size
+        with Image.open(BytesIO(image) if isinstance(image, bytes) else image) as img:
+            w, h = img.size
+        return w * h <= IMAGE_MAX_RESOLUTION
+
     def _try_to_map_products(self, template, ext_products):
         """
         :return: {'49-174': product.product(393,), '49-175': product.product(394,)}
@@ -558,9 +590,9 @@ class IntegrationProductTemplateExternal(models.Model):
             if ext_product.get('barcode') and ext_product['barcode'] != IS_FALSE:
                 upd_product['barcode'] = ext_product['barcode']
 
-            if image_list and ext_images['images']:
+            if image_list and image_list[0] in ext_images['images']:
                 img_data = ext_images['images'][image_list[0]]
-                upd_product['image_1920'] = base64.b64encode(img_data)
+                upd_product['image_1920'] = self._get_image_base64(img_data)
 
             self._update_variant_custom_field_hook(product, ext_product, upd_product)
             product.with_context(skip_product_export=True).write(upd_product)
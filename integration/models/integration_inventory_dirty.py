@@ -0,0 +1,135 @@
+#  See LICENSE file for full copyright and licensing details.
+
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+
+class IntegrationInventoryDirty(models.Model):
+    """
+    Products which quantities were changed, but not yet exported to the integration.
+
+    Stock changes only mark the products here. The pending products are exported by
+    the cron once they waited for the export window (`integration.export_inventory_window`
+    seconds), so a product changed many times during the window is exported once with
+    its latest quantity. Urgent products (stock crossing zero) are exported immediately,
+    the ones missed by the urgent job are exported by the next cron run.
+    """
+    _name = 'integration.inventory.dirty'
+    _description = 'Integration Inventory Dirty Product'
+    _order = 'id'
+
+    integration_id = fields.Many2one(
+        comodel_name='sale.integration',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    product_id = fields.Many2one(
+        comodel_name='product.product',
+        required=True,
+        ondelete='cascade',
+    )
+    is_urgent = fields.Boolean(
+        string='Urgent',
+    )
+
+    _sql_constraints = [
+        (
+            'uniq_integration_product',
+            'unique(integration_id, product_id)',
+            'Product can be marked only once per integration',
+        ),
+    ]
+
+    @api.model
+    def get_export_window(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'integration.export_inventory_window', 0))
+
+    @api.model
+    def mark_products(self, integration, products, urgent_products=None):
+        """Add products to the dirty set. Marking an already marked product is a no-op."""
+        if not products:
+            return
+
+        urgent_ids = set(urgent_products.ids if urgent_products else [])
+
+        now = fields.Datetime.now()
+        uid = self.env.uid
+        rows = [
+            (integration.id, product_id, product_id in urgent_ids, now, now, uid, uid)
+            for product_id in products.ids
+        ]
+
+        self.flush_model()
+        self.env.cr.execute(f'''
+            INSERT INTO {self._table}
+                (integration_id, product_id, is_urgent, create_date, write_date, create_uid, write_uid)
+            VALUES {', '.join(['%s'] * len(rows))}
+            ON CONFLICT (integration_id, product_id) DO UPDATE
+                SET is_urgent = {self._table}.is_urgent OR EXCLUDED.is_urgent
+        ''', rows)
+        self.invalidate_model()
+
+        if urgent_ids:
+            # An urgent job which is already enqueued may remove the dirty products before
+            # this transaction is committed. So the marks are deduplicated within a second
+            # only and the marks missed by the urgent job are exported by the cron.
+            self.with_delay(
+                description='Export Urgent Product Quantities to External',
+                identity_key=f'export_inventory_urgent_{integration.id}_{int(time.time())}',
+            ).export_dirty(integration_ids=[integration.id], urgent=True)
+
+    @api.model
+    def _cron_export_dirty(self):
+        self.export_dirty()
+
+    @api.model
+    def export_dirty(self, integration_ids=None, urgent=False):
+        """
+        Export the pending products: all urgent ones or all urgent and all that waited
+        for the export window. The exported products are removed from the dirty set.
+        """
+        conditions = []
+        params = []
+
+        if urgent:
+            conditions.append('is_urgent')
+        else:
+            deadline = fields.Datetime.now() - timedelta(seconds=self.get_export_window())
+            conditions.append('(is_urgent OR create_date <= %s)')
+            params.append(deadline)
+
+        if integration_ids:
+            conditions.append('integration_id IN %s')
+            params.append(tuple(integration_ids))
+
+        self.flush_model()
+        self.env.cr.execute(f'''
+            DELETE FROM {self._table}
+            WHERE {' AND '.join(conditions)}
+            RETURNING integration_id, product_id
+        ''', params)
+        rows = self.env.cr.fetchall()
+        self.invalidate_model()
+
+        product_ids_by_integration = defaultdict(set)
+        for integration_id, product_id in rows:
+            product_ids_by_integration[integration_id].add(product_id)
+
+        Product = self.env['product.product']
+        for integration_id, product_ids in product_ids_by_integration.items():
+            integration = self.env['sale.integration'].browse(integration_id)
+            products = Product.browse(product_ids).exists()
+
+            # Kits are resolved once per export instead of once per stock change
+            products |= products.get_used_in_kits_recursively().product_variant_ids
+            products = products.filtered(lambda x: integration in x.integration_ids)
+
+            if products:
+                products.export_inventory_by_jobs(integration)
+
+        return True
@@ -0,0 +1,99 @@
+#  See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+from odoo.tools import table_exists
+
+
+class IntegrationKitComponent(models.Model):
+    """
+    Reverse index `component -> kit template` of the phantom BoMs at any depth.
+
+    The index is rebuilt for the affected kits on every change of BoMs and BoM lines,
+    so the kits using a product are found with a single indexed lookup.
+    """
+    _name = 'integration.kit.component'
+    _description = 'Integration Kit Component'
+    _log_access = False
+
+    kit_template_id = fields.Many2one(
+        comodel_name='product.template',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    product_id = fields.Many2one(
+        comodel_name='product.product',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+
+    def init(self):
+        if table_exists(self.env.cr, 'mrp_bom'):
+            self._rebuild_index()
+
+    @api.model
+    def get_kit_templates(self, products):
+        """Templates of all the kits containing the products at any depth"""
+        if not products:
+            return self.env['product.template']
+
+        self.flush_model()
+        self.env.cr.execute(f'''
+            SELECT DISTINCT kit_template_id
+            FROM {self._table}
+            WHERE product_id IN %s
+        ''', (tuple(products.ids),))
+
+        return self.env['product.template'].browse([x[0] for x in self.env.cr.fetchall()])
+
+    @api.model
+    def update_kits(self, templates):
+        """Rebuild the index of the templates and all the kits containing them"""
+        if not templates:
+            return
+
+        variants = self.env['product.product'].with_context(active_test=False).search([
+            ('product_tmpl_id', 'in', templates.ids),
+        ])
+        kit_templates = templates | self.get_kit_templates(variants)
+
+        self._rebuild_index(kit_templates.ids)
+
+    def _rebuild_index(self, kit_template_ids=None):
+        self.env['mrp.bom'].flush_model()
+        self.env['mrp.bom.line'].flush_model()
+
+        kit_condition = 'TRUE'
+        params = []
+        if kit_template_ids is not None:
+            kit_condition = 'b.product_tmpl_id IN %s'
+            params = [tuple(kit_template_ids)]
+
+            self.env.cr.execute(
+                f'DELETE FROM {self._table} WHERE kit_template_id IN %s',
+                (tuple(kit_template_ids),),
+            )
+        else:
+            self.env.cr.execute(f'DELETE FROM {self._table}')
+
+        # UNION (not UNION ALL) makes the recursion stop on cyclic kits
+        self.env.cr.execute(f'''
+            WITH RECURSIVE kit_component(kit_template_id, product_id) AS (
+                SELECT b.product_tmpl_id, l.product_id
+                FROM mrp_bom b
+                JOIN mrp_bom_line l ON l.bom_id = b.id
+                WHERE b.type = 'phantom' AND b.active AND {kit_condition}
+              UNION
+                SELECT kc.kit_template_id, l.product_id
+                FROM kit_component kc
+                JOIN product_product p ON p.id = kc.product_id
+                JOIN mrp_bom b ON b.product_tmpl_id = p.product_tmpl_id
+                JOIN mrp_bom_line l ON l.bom_id = b.id
+                WHERE b.type = 'phantom' AND b.active
+            )
+            INSERT INTO {self._table} (kit_template_id, product_id)
+            SELECT DISTINCT kit_template_id, product_id FROM kit_component
+        ''', params)
+
+        self.invalidate_model()
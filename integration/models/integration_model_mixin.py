@@ -8,6 +8,14 @@ class IntegrationModelMixin(models.AbstractModel):
     _name = 'integration.model.mixin'
     _description = 'Integration Model Mixin'
 
+    def unlink(self):
+        mapping_model_name = f'integration.{self._name}.mapping'
+        result = super().unlink()
+        # Mappings are removed by the database cascade, so reset the mapping index
+        if mapping_model_name in self.env:
+            self.env[mapping_model_name]._mapping_index_changed()
+        return result
+
     @property
     def mrp_enabled(self):
         return self.env.ref('base.module_mrp').state == 'installed'
@@ -73,6 +81,15 @@ class IntegrationModelMixin(models.AbstractModel):
         mapping_model = self.env[f'integration.{self._name}.mapping']
         return mapping_model.to_odoo(integration, code, raise_error)
 
+    @api.model
+    def from_external_many(self, integration, codes):
+        mapping_model = self.env[f'integration.{self._name}.mapping']
+        return mapping_model.to_odoo_many(integration, codes)
+
+    def to_external_record_many(self, integration):
+        mapping_model = self.env[f'integration.{self._name}.mapping']
+        return mapping_model.to_external_many(integration, self)
+
     @api.model
     def from_external_name(self, integration, name, raise_error=True):
         mapping_model = self.env[f'integration.{self._name}.mapping']
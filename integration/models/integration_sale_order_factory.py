@@ -1,6 +1,7 @@
 # See LICENSE file for full copyright and licensing details.
 
 from ..exceptions import ApiImportError
+from ..tools import transaction_memo
 from .sale_integration import DATETIME_FORMAT
 
 import logging
@@ -14,6 +15,9 @@ from odoo.tools.float_utils import float_compare, float_is_zero, float_round
 
 OTHER = 'other'
 
+# Key of the per-transaction memo of the country/state/language resolutions
+PARTNER_LOOKUP_KEY = 'integration.partner.lookup'
+
 
 _logger = logging.getLogger(__name__)
 
@@ -230,6 +234,11 @@ class IntegrationSaleOrderFactory(models.AbstractModel):
         shipping = False
         billing = False
 
+        self._preload_partner_lookup(
+            integration,
+            [order_data.get(x) for x in ('customer', 'shipping', 'billing')],
+        )
+
         if order_data.get('customer'):
             customer = self._fetch_odoo_partner(
                 integration,
@@ -271,36 +280,118 @@ class IntegrationSaleOrderFactory(models.AbstractModel):
 
         return customer, shipping, billing
 
+    @api.model
+    def _get_partner_lookup(self, integration):
+        """
+        Memo of the country/state/language resolutions of the integration. It lives until
+        the end of the transaction, so it's shared by all the orders of a jobs batch.
+        """
+        data = transaction_memo(self.env, PARTNER_LOOKUP_KEY)
+
+        if integration.id not in data:
+            data[integration.id] = {
+                'country': {},
+                'state': {},
+                'language': {},
+            }
+
+        if 'country_code' not in data:
+            # Odoo countries and states are the same for all the integrations
+            data['country_code'] = {}
+            data['state_code'] = {}
+            data['country_has_states'] = {}
+
+        return data[integration.id], data
+
+    @api.model
+    def _preload_partner_lookup(self, integration, partners_data):
+        """Resolve the countries/states/languages of all the partners at once"""
+        lookup, data = self._get_partner_lookup(integration)
+        partners_data = [x for x in partners_data if x]
+
+        for key, model_name in [
+            ('country', 'res.country'),
+            ('state', 'res.country.state'),
+            ('language', 'res.lang'),
+        ]:
+            codes = {x[key] for x in partners_data if x.get(key)} - set(lookup[key])
+            if not codes:
+                continue
+
+            # Not mapped and ambiguous codes are resolved (and reported) by `from_external()`
+            # on a miss
+            records = self.env[model_name].from_external_many(integration, codes)
+            lookup[key].update({
+                code: record.id for code, record in records.items() if len(record) == 1
+            })
+
+        # Only the requested ISO codes are read, the others are searched on a miss
+        country_codes = {
+            x['country_code'].upper() for x in partners_data if x.get('country_code')
+        } - set(data['country_code'])
+
+        if country_codes:
+            countries = self.env['res.country'].search_read(
+                [('code', 'in', list(country_codes))], ['code'])
+            data['country_code'].update({x['code'].upper(): x['id'] for x in countries})
+
+    @api.model
+    def _lookup_from_external(self, integration, key, model_name, code):
+        lookup, __ = self._get_partner_lookup(integration)
+        Model = self.env[model_name]
+
+        if code not in lookup[key]:
+            lookup[key][code] = Model.from_external(integration, code).id
+
+        return Model.browse(lookup[key][code])
+
     @api.model
     def _find_odoo_country(self, integration, partner_data):
         country = self.env['res.country']
         if partner_data.get('country'):
-            country = self.env['res.country'].from_external(
-                integration, partner_data.get('country')
+            country = self._lookup_from_external(
+                integration, 'country', 'res.country', partner_data.get('country'),
             )
         elif partner_data.get('country_code'):
-            country = self.env['res.country'].search([
-                ('code', '=ilike', partner_data.get('country_code')),
-            ], limit=1)
+            __, data = self._get_partner_lookup(integration)
+            code = partner_data.get('country_code').upper()
+
+            if code not in data['country_code']:
+                data['country_code'][code] = country.search([
+                    ('code', '=ilike', code),
+                ], limit=1).id
+
+            country = country.browse(data['country_code'][code])
         return country
 
     @api.model
     def _find_odoo_state(self, integration, odoo_country, partner_data):
         state = self.env['res.country.state']
-        if not state.search([('country_id', '=', odoo_country.id)]):
+        __, data = self._get_partner_lookup(integration)
+
+        country_id = odoo_country.id or False
+        if country_id not in data['country_has_states']:
+            data['country_has_states'][country_id] = bool(
+                state.search_count([('country_id', '=', country_id)], limit=1))
+
+        if not data['country_has_states'][country_id]:
             # If it is a Country without known states in Odoo let's skip this `finding`
             return state
 
         if partner_data.get('state'):
-            state = state.from_external(
-                integration,
-                partner_data.get('state'),
+            state = self._lookup_from_external(
+                integration, 'state', 'res.country.state', partner_data.get('state'),
             )
         elif partner_data.get('state_code') and odoo_country:
-            state = state.search([
-                ('country_id', '=', odoo_country.id),
-                ('code', '=ilike', partner_data.get('state_code')),
-            ], limit=1)
+            key = (country_id, partner_data.get('state_code').lower())
+
+            if key not in data['state_code']:
+                data['state_code'][key] = state.search([
+                    ('country_id', '=', country_id),
+                    ('code', '=ilike', partner_data.get('state_code')),
+                ], limit=1).id
+
+            state = state.browse(data['state_code'][key])
 
         return state
 
@@ -420,8 +511,8 @@ class IntegrationSaleOrderFactory(models.AbstractModel):
                 partner_vals[key] = partner_data.get(key)
 
         if partner_data.get('language'):
-            language = self.env['res.lang'].from_external(
-                integration, partner_data.get('language')
+            language = self._lookup_from_external(
+                integration, 'language', 'res.lang', partner_data.get('language'),
             )
             if language:
                 partner_vals['lang'] = language.code
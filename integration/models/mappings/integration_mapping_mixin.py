@@ -1,7 +1,14 @@
 # See LICENSE file for full copyright and licensing details.
 
 from ...exceptions import NotMappedFromExternal, NotMappedToExternal, NotMappedFromExternalMulti
-from odoo import models, api, fields, _
+from odoo import models, api, fields, tools, _
+
+from collections import defaultdict
+
+# Attribute of `cr.transaction` holding the mapping index state of the transaction
+MAPPING_INDEX_STATE = '_integration_mapping_index'
+# Cached entries per model and integration, the cache is dropped when exceeded
+MAPPING_INDEX_MAXSIZE = 10000
 
 
 class IntegrationMappingMixin(models.AbstractModel):
@@ -15,37 +22,54 @@ class IntegrationMappingMixin(models.AbstractModel):
     )
 
     def write(self, vals):
+        index_changed = self._is_mapping_index_changed(vals)
         result = super().write(vals)
+        if index_changed:
+            self._mapping_index_changed()
         self.requeue_jobs_if_needed()
         return result
 
-    @api.model
-    def create(self, vals):
-        result = super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        result = super().create(vals_list)
+        self._mapping_index_changed()
         result.requeue_jobs_if_needed()
         return result
 
-    def requeue_jobs_if_needed(self):
-        QueueJob = self.env['queue.job']
+    def unlink(self):
+        result = super().unlink()
+        self._mapping_index_changed()
+        return result
+
+    def _is_mapping_index_changed(self, vals):
+        field_names = [x for x in self._mapping_fields + ('integration_id',) if x in vals]
 
         for mapping in self:
-            internal_field_name, external_field_name = self._mapping_fields
+            for field_name in field_names:
+                if mapping[field_name].id != (vals[field_name] or False):
+                    return True
 
-            internal_rec = getattr(mapping, internal_field_name)
-            external_rec = getattr(mapping, external_field_name)
+        return False
 
-            if internal_rec and external_rec:
-                QueueJob.requeue_integration_jobs(
-                    'NotMappedFromExternal',
-                    mapping._name,
-                    external_rec.code,
-                )
+    def requeue_jobs_if_needed(self):
+        internal_field_name, external_field_name = self._mapping_fields
 
-                QueueJob.requeue_integration_jobs(
-                    'NotMappedToExternal',
-                    self._name,
-                    str(internal_rec.id),
-                )
+        mappings = self.filtered(lambda x: x[internal_field_name] and x[external_field_name])
+        if not mappings:
+            return
+
+        QueueJob = self.env['queue.job']
+        QueueJob.requeue_integration_jobs(
+            'NotMappedFromExternal',
+            self._name,
+            mappings.mapped(external_field_name).mapped('code'),
+        )
+
+        QueueJob.requeue_integration_jobs(
+            'NotMappedToExternal',
+            self._name,
+            [str(x) for x in mappings.mapped(internal_field_name).ids],
+        )
 
     @property
     def external_model(self):
@@ -123,6 +147,198 @@ class IntegrationMappingMixin(models.AbstractModel):
             mapping.write({internal_field_name: odoo_object_id})
         return mapping
 
+    def init(self):
+        if self._abstract:
+            return
+
+        # Version of the mapping index, increased when a change of the index is committed
+        self.env.cr.execute(f'CREATE SEQUENCE IF NOT EXISTS {self._mapping_index_sequence}')
+
+    @property
+    def _mapping_index_sequence(self):
+        return f'{self._table}_index_seq'
+
+    def _get_mapping_index_state(self):
+        """
+        Mapping index state of the transaction: the mapping models changed by the
+        transaction and the index versions read by it. The state is kept until the
+        transaction is committed or rolled back, whatever the flushes and savepoints.
+        """
+        cr = self.env.cr
+        state = getattr(cr.transaction, MAPPING_INDEX_STATE, None)
+
+        if state is None:
+            state = {'changed': set(), 'versions': {}}
+            setattr(cr.transaction, MAPPING_INDEX_STATE, state)
+
+            cr.postcommit.add(lambda: self._mapping_index_committed(cr, state))
+            cr.postrollback.add(lambda: setattr(cr.transaction, MAPPING_INDEX_STATE, None))
+
+        return state
+
+    def _mapping_index_committed(self, cr, state):
+        setattr(cr.transaction, MAPPING_INDEX_STATE, None)
+
+        for model_name in state['changed']:
+            Mapping = self.env[model_name]
+            # The change is visible now, the other workers drop their cached index once
+            # they read the new version
+            cr.execute(f"SELECT nextval('{Mapping._mapping_index_sequence}')")
+            Mapping._reset_mapping_index_cache(cr.fetchone()[0])
+
+    @api.model
+    def _mapping_index_changed(self):
+        """
+        The mapping index of the model is changed by the current transaction: read it from
+        the database until the transaction ends, so changes which are rolled back (even to a
+        savepoint) are never cached, and drop the cached index of the model on commit.
+        """
+        self._get_mapping_index_state()['changed'].add(self._name)
+
+    @api.model
+    @tools.ormcache()
+    def _get_mapping_index_cache(self):
+        """
+        Per-process cache of the mapping index of the model:
+        `{'version': index version, 'integrations': {integration id: {key: value}}}`
+        """
+        return {'version': None, 'integrations': defaultdict(dict)}
+
+    def _reset_mapping_index_cache(self, version):
+        index_cache = self._get_mapping_index_cache()
+        # Replaced instead of cleared, so the values read before are not put back by
+        # the transactions still running
+        index_cache['integrations'] = defaultdict(dict)
+        index_cache['version'] = version
+
+    def _get_integration_index_cache(self, integration_id):
+        """Cached mapping index of the integration, None while the transaction changes it"""
+        state = self._get_mapping_index_state()
+        if self._name in state['changed']:
+            return None
+
+        index_cache = self._get_mapping_index_cache()
+
+        # The version is read once per transaction
+        if self._name not in state['versions']:
+            self.env.cr.execute(f'''
+                SELECT CASE WHEN is_called THEN last_value ELSE 0 END
+                FROM {self._mapping_index_sequence}
+            ''')
+            state['versions'][self._name] = self.env.cr.fetchone()[0]
+
+            if index_cache['version'] != state['versions'][self._name]:
+                self._reset_mapping_index_cache(state['versions'][self._name])
+
+        if index_cache['version'] != state['versions'][self._name]:
+            return None
+
+        integration_cache = index_cache['integrations'][integration_id]
+        if len(integration_cache) >= MAPPING_INDEX_MAXSIZE:
+            integration_cache.clear()
+
+        return integration_cache
+
+    def _get_index_value(self, integration_id, key, compute):
+        """Value of the cached mapping index of the integration, computed on a miss"""
+        integration_cache = self._get_integration_index_cache(integration_id)
+
+        if integration_cache is None:
+            return compute()
+
+        if key not in integration_cache:
+            integration_cache[key] = compute()
+
+        return integration_cache[key]
+
+    @api.model
+    def _get_internal_id(self, integration_id, code):
+        """
+        Cached `code -> odoo id` part of the mapping index. Returns False when the code is
+        not mapped and None when it can't be resolved unambiguously from the index.
+        """
+        def compute():
+            rows = self._read_mapping_index(integration_id, codes=[code])
+            return None if len(rows) > 1 else (rows and rows[0][1] or False)
+
+        return self._get_index_value(integration_id, ('code', code), compute)
+
+    @api.model
+    def _get_external_id(self, integration_id, odoo_id):
+        """Cached `odoo id -> external id` part of the mapping index"""
+        def compute():
+            rows = self._read_mapping_index(integration_id, odoo_ids=[odoo_id])
+            return rows and max(rows)[2] or False
+
+        return self._get_index_value(integration_id, ('odoo', odoo_id), compute)
+
+    def _read_mapping_index(self, integration_id, codes=None, odoo_ids=None):
+        """Rows (mapping_id, odoo_id, external_id, code) of the integration mappings"""
+        internal_field_name, external_field_name = self._mapping_fields
+
+        query = f'''
+            SELECT m.id, m.{internal_field_name}, m.{external_field_name}, e.code
+            FROM {self._table} m
+            JOIN {self.external_model._table} e ON e.id = m.{external_field_name}
+            WHERE m.integration_id = %s
+        '''
+        params = [integration_id]
+
+        if codes is not None:
+            query += ' AND e.code IN %s'
+            params.append(tuple(codes))
+
+        if odoo_ids is not None:
+            query += f' AND m.{internal_field_name} IN %s'
+            params.append(tuple(odoo_ids))
+
+        self.flush_model()
+        self.external_model.flush_model(['code', 'integration_id'])
+        self.env.cr.execute(query, params)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def to_odoo_many(self, integration, codes):
+        """Resolve all the codes in a single query: {code: odoo record} of the mapped codes"""
+        codes = list(set(codes))
+        if not codes:
+            return {}
+
+        rows_by_code = defaultdict(list)
+        for row in self._read_mapping_index(integration.id, codes=codes):
+            rows_by_code[row[3]].append(row)
+
+        rows = [x[0] for x in rows_by_code.values() if len(x) == 1 and x[0][1]]
+
+        # Browse all the records at once, so they share the prefetching
+        records = self.internal_model.browse([x[1] for x in rows])
+        result = {
+            code: record for (__, __, __, code), record in zip(rows, records)
+        }
+
+        # Ambiguous codes are resolved like in `to_odoo`
+        for code in [x for x, code_rows in rows_by_code.items() if len(code_rows) > 1]:
+            record = self.to_odoo(integration, code, raise_error=False)
+            if record:
+                result[code] = record
+
+        return result
+
+    @api.model
+    def to_external_many(self, integration, odoo_values):
+        """Resolve all the records in a single query: {odoo id: external record}"""
+        if not odoo_values:
+            return {}
+
+        # The latest mapping wins, like in `to_external_record`
+        rows = sorted(self._read_mapping_index(integration.id, odoo_ids=odoo_values.ids))
+
+        # Browse all the records at once, so they share the prefetching
+        records = self.external_model.browse([x[2] for x in rows])
+        return {
+            odoo_id: record for (__, odoo_id, __, __), record in zip(rows, records)
+        }
+
     @api.model
     def get_mapping(self, integration, code):
         external = self.external_model.search([
@@ -161,8 +377,14 @@ class IntegrationMappingMixin(models.AbstractModel):
 
     @api.model
     def to_odoo(self, integration, code, raise_error=True):
-        mapping = self.get_mapping(integration, code)
-        return self._get_internal_record(mapping, integration, code, raise_error)
+        odoo_id = self._get_internal_id(integration.id, code)
+
+        if odoo_id is None:
+            mapping = self.get_mapping(integration, code)
+            return self._get_internal_record(mapping, integration, code, raise_error)
+
+        record = self.internal_model.browse(odoo_id)
+        return self._check_internal_record(record, integration, code, raise_error)
 
     @api.model
     def to_odoo_from_name(self, integration, name, raise_error=True):
@@ -172,7 +394,9 @@ class IntegrationMappingMixin(models.AbstractModel):
     def _get_internal_record(self, mapping, integration, code, raise_error=True):
         internal_field_name, __ = self._mapping_fields
         record = getattr(mapping, internal_field_name)
+        return self._check_internal_record(record, integration, code, raise_error)
 
+    def _check_internal_record(self, record, integration, code, raise_error=True):
         if not record and raise_error:
             raise NotMappedFromExternal(
                 _('Can\'t map external code to odoo'),
@@ -185,21 +409,16 @@ class IntegrationMappingMixin(models.AbstractModel):
 
     @api.model
     def to_external_record(self, integration, odoo_value):
-        internal_field_name, external_field_name = self._mapping_fields
+        external_id = odoo_value.id and self._get_external_id(integration.id, odoo_value.id)
 
-        mapping = self.search([
-            ('integration_id', '=', integration.id),
-            (internal_field_name, '=', odoo_value.id),
-        ], order='id desc', limit=1)
-
-        if not mapping:
+        if not external_id:
             raise NotMappedToExternal(
                 _('Can\'t map odoo value to external code'),
                 self._name,
                 odoo_value.id,
                 integration,
             )
-        record = getattr(mapping, external_field_name)
+        record = self.external_model.browse(external_id)
         return record
 
     @api.model
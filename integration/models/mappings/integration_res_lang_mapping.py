@@ -1,6 +1,6 @@
 # See LICENSE file for full copyright and licensing details.
 
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class IntegrationResLangMapping(models.Model):
@@ -27,3 +27,17 @@ class IntegrationResLangMapping(models.Model):
             'Language mapping should be unique per integration'
         ),
     ]
+
+    @api.model
+    def _get_language_codes(self, integration_id):
+        """
+        [(external_language_code, odoo_language_code)] of the integration language mappings,
+        cached with the mapping index
+        """
+        def compute():
+            language_mappings = self.search([('integration_id', '=', integration_id)])
+            return [
+                (x.external_language_id.code, x.language_id.code) for x in language_mappings
+            ]
+
+        return self._get_index_value(integration_id, ('language_codes',), compute)
@@ -9,13 +9,22 @@ class MrpBom(models.Model):
     @api.model
     def create(self, vals_list):
         boms = super(MrpBom, self).create(vals_list)
+        self.env['integration.kit.component'].update_kits(boms.product_tmpl_id)
         boms._trigger_kit_template_export()
         return boms
 
     def write(self, vals):
+        templates = self.product_tmpl_id
         result = super(MrpBom, self).write(vals)
+        self.env['integration.kit.component'].update_kits(templates | self.product_tmpl_id)
         self._trigger_kit_template_export()
         return result
 
+    def unlink(self):
+        templates = self.product_tmpl_id
+        result = super(MrpBom, self).unlink()
+        self.env['integration.kit.component'].update_kits(templates)
+        return result
+
     def _trigger_kit_template_export(self):
         self.filtered(lambda x: x.type == 'phantom').product_tmpl_id.trigger_export()
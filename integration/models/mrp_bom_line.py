@@ -9,10 +9,22 @@ class MrpBomLine(models.Model):
     @api.model
     def create(self, vals_list):
         lines = super(MrpBomLine, self).create(vals_list)
+        self.env['integration.kit.component'].update_kits(lines.bom_id.product_tmpl_id)
         lines.bom_id._trigger_kit_template_export()
         return lines
 
     def write(self, vals):
+        boms = self.bom_id
         result = super(MrpBomLine, self).write(vals)
+        if {'product_id', 'bom_id'} & set(vals):
+            self.env['integration.kit.component'].update_kits(
+                (boms | self.bom_id).product_tmpl_id,
+            )
         self.bom_id._trigger_kit_template_export()
         return result
+
+    def unlink(self):
+        templates = self.bom_id.product_tmpl_id
+        result = super(MrpBomLine, self).unlink()
+        self.env['integration.kit.component'].update_kits(templates)
+        return result
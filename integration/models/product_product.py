@@ -2,6 +2,7 @@
 
 from odoo import fields, models, api, _
 from odoo.exceptions import UserError
+from odoo.tools.float_utils import float_is_zero, float_round
 from ..exceptions import NotMappedToExternal
 
 import logging
@@ -107,53 +108,155 @@ class ProductProduct(models.Model):
 
     def to_export_format(self, integration):
         self.ensure_one()
+        return self.to_export_format_multi(integration)[0]
 
-        try:
-            product_external_code = self.to_external(integration)
-        except NotMappedToExternal:
-            product_external_code = None
+    def to_export_format_multi(self, integration):
+        """
+        Export format of all the variants. Mappings, ecommerce fields and attribute values
+        are resolved once for the whole recordset instead of once per variant.
+        """
+        external_records = self.to_external_record_many(integration)
 
-        # attributes
-        attribute_values = []
-        for attribute_value in self.product_template_attribute_value_ids:
-            value = attribute_value.product_attribute_value_id.\
-                to_export_format_or_export(integration)
+        ecommerce_fields = {}
+        attribute_values_data = {}
 
-            attribute_values.append(value)
+        result = []
+        for product in self:
+            external_record = external_records.get(product.id)
+            product_external_code = external_record.code if external_record else None
 
-        result = {
-            'id': self.id,
-            'external_id': product_external_code,
-            'attribute_values': attribute_values,
-        }
+            # attributes
+            attribute_values = []
+            for attribute_value in product.product_template_attribute_value_ids:
+                value = attribute_value.product_attribute_value_id
+
+                if value.id not in attribute_values_data:
+                    attribute_values_data[value.id] = value.to_export_format_or_export(
+                        integration,
+                    )
+
+                attribute_values.append(attribute_values_data[value.id])
+
+            data = {
+                'id': product.id,
+                'external_id': product_external_code,
+                'attribute_values': attribute_values,
+            }
+
+            # Set of the fields depends only on whether the variant is already exported
+            is_exported = bool(product_external_code)
+            if is_exported not in ecommerce_fields:
+                search_domain = product._variant_ecommerce_field_domain(
+                    integration,
+                    product_external_code,
+                )
+                ecommerce_fields[is_exported] = self.env['product.ecommerce.field.mapping']\
+                    .search(search_domain).mapped('ecommerce_field_id')
 
-        search_domain = self._variant_ecommerce_field_domain(integration, product_external_code)
+            for field in ecommerce_fields[is_exported]:
+                data[field.technical_name] = integration.calculate_field_value(product, field)
 
-        for field in self.env['product.ecommerce.field.mapping'].\
-                search(search_domain).mapped('ecommerce_field_id'):
-            result[field.technical_name] = integration.calculate_field_value(self, field)
+            result.append(data)
 
         return result
 
-    def get_used_in_kits_recursively(self):
-        tmpl = self.env['product.template']
+    def _get_export_quantities(self, integration):
+        """
+        Quantities to export: {product_id: quantity}.
 
-        if not self.mrp_enabled:
-            return tmpl
+        Quantities of the products and of the components of all the kits in the block
+        are computed at once by the grouped stock aggregation (the location context
+        must be the same for all the products), kit quantities are derived from this
+        snapshot in memory.
+        """
+        kit_lines = self._get_kit_lines(integration)
+        kits = self.browse(list(kit_lines))
 
-        kits = self.env['mrp.bom'].search([
-            ('bom_line_ids.product_id', 'in', self.ids),
-            ('type', '=', 'phantom'),
+        components = self.browse([
+            bom_line.product_id.id
+            for __, lines in kit_lines.values()
+            for bom_line, __ in lines
         ])
+        snapshot_products = (self - kits) | components
 
-        if not kits:
-            return tmpl
+        quantities = dict(zip(
+            snapshot_products.ids,
+            snapshot_products.with_context(location=integration.location_ids.ids)
+            .mapped(integration.synchronise_qty_field),
+        ))
+
+        for kit_id, (bom, lines) in kit_lines.items():
+            quantities[kit_id] = self._compute_kit_quantity(bom, lines, quantities)
+
+        return quantities
 
-        return (
-            kits.product_tmpl_id
-            + kits.product_tmpl_id.product_variant_ids.get_used_in_kits_recursively()
+    def _get_kit_lines(self, integration):
+        """
+        Leaf component lines of the kits: {kit_id: (bom, [(bom_line, line_data)])}.
+        Nested kits are exploded by the BoM itself.
+        """
+        if not self or not self.mrp_enabled:
+            return {}
+
+        boms = self.env['mrp.bom']._bom_find(
+            self,
+            company_id=integration.company_id.id,
+            bom_type='phantom',
         )
 
+        kit_lines = {}
+        for product in self:
+            bom = boms.get(product)
+            if not bom:
+                continue
+
+            __, lines = bom.explode(product, 1)
+            kit_lines[product.id] = (bom, lines)
+
+        return kit_lines
+
+    @staticmethod
+    def _compute_kit_quantity(bom, lines, quantities):
+        # The same calculation as in `mrp` module, based on the quantities snapshot
+        ratios = []
+        for bom_line, line_data in lines:
+            component = bom_line.product_id
+            line_uom = bom_line.product_uom_id
+
+            if component.type != 'product' \
+                    or float_is_zero(line_data['qty'], precision_rounding=line_uom.rounding):
+                continue
+
+            uom_qty_per_kit = line_data['qty'] / line_data['original_qty']
+            qty_per_kit = line_uom._compute_quantity(
+                uom_qty_per_kit,
+                component.uom_id,
+                round=False,
+                raise_if_failure=False,
+            )
+            if not qty_per_kit:
+                continue
+
+            ratios.append(float_round(
+                quantities[component.id] / qty_per_kit,
+                precision_rounding=component.uom_id.rounding,
+                rounding_method='DOWN',
+            ))
+
+        if not ratios:
+            return 0
+
+        return min(ratios) * bom.product_qty // 1
+
+    def get_used_in_kits_recursively(self):
+        tmpl = self.env['product.template']
+
+        if not self.mrp_enabled:
+            return tmpl
+
+        # Kit templates at any depth are kept in the reverse index
+        return self.env['integration.kit.component'].get_kit_templates(self)
+
     @api.depends('product_template_attribute_value_ids.price_extra', 'variant_extra_price')
     def _compute_product_price_extra(self):
         super(ProductProduct, self)._compute_product_price_extra()
@@ -229,13 +332,18 @@ class ProductProduct(models.Model):
                       "the integration with name '%s'.") % integration.name
                 )
 
-            for product in self.filtered(lambda x: integration in x.integration_ids):
-                quantity = getattr(
-                    product.with_context(location=integration.location_ids.ids),
-                    integration.synchronise_qty_field
-                )
+            products = self.filtered(lambda x: integration in x.integration_ids)
+
+            quantities = products._get_export_quantities(integration)
+            external_records = products.to_external_record_many(integration)
+
+            for product in products:
+                quantity = quantities[product.id]
 
-                product_external = product.to_external_record(integration)
+                product_external = external_records.get(product.id)
+                if not product_external:
+                    # Raises `NotMappedToExternal`
+                    product_external = product.to_external_record(integration)
 
                 if product.company_id and product.company_id != integration.company_id:
                     raise UserError(
@@ -1,6 +1,6 @@
 # See LICENSE file for full copyright and licensing details.
 
-from ..tools import _guess_mimetype
+from ..tools import _guess_mimetype, _image_checksum
 from .template_converter import TemplateConverter
 from odoo.exceptions import ValidationError, UserError
 from odoo import models, fields, api, _
@@ -362,6 +362,10 @@ class ProductTemplate(models.Model):
         contexted_template = self.with_context(active_test=False)
         return TemplateConverter(integration).convert(contexted_template)
 
+    def to_export_format_multi(self, integration):
+        contexted_templates = self.with_context(active_test=False)
+        return TemplateConverter(integration).convert_many(contexted_templates)
+
     def to_images_export_format(self, integration):
         self.ensure_one()
 
@@ -398,6 +402,7 @@ class ProductTemplate(models.Model):
             default_image = {
                 'data': default_image_data,
                 'mimetype': _guess_mimetype(default_image_data),
+                'checksum': _image_checksum(default_image_data),
             }
         else:
             default_image = None
@@ -406,7 +411,8 @@ class ProductTemplate(models.Model):
         for extra_image in extra_images:
             extra_image_data = {
                 'data': extra_image.image_1920,
-                'mimetype': _guess_mimetype(extra_image.image_1920)
+                'mimetype': _guess_mimetype(extra_image.image_1920),
+                'checksum': _image_checksum(extra_image.image_1920),
             }
             extra_images_data.append(extra_image_data)
 
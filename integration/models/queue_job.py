@@ -88,7 +88,7 @@ class QueueJob(models.Model):
             ('state', '=', FAILED),
             ('integration_exception_name', '=', exception_name),
             ('integration_model_name', '=', model_name),
-            ('integration_key', '=', key),
+            ('integration_key', 'in' if isinstance(key, list) else '=', key),
         ])
 
         if jobs:
@@ -955,15 +955,23 @@ class SaleIntegration(models.Model):
     def integrationApiImportProducts(self):
         limit = self.get_external_block_limit()
         adapter = self._build_adapter()
-        template_ids = adapter.get_product_template_ids()
 
-        while template_ids:
-            self.with_context(company_id=self.company_id.id).with_delay(
-                description='Initial Products Import: '
-                            'Import Products Batch (create external records + auto-matching)'
-            ).import_external_product(template_ids[:limit])
+        template_ids = []
+        for template_ids_block in adapter.iter_product_template_ids():
+            template_ids += template_ids_block
+
+            while len(template_ids) >= limit:
+                self._delay_import_external_product(template_ids[:limit])
+                template_ids = template_ids[limit:]
+
+        if template_ids:
+            self._delay_import_external_product(template_ids)
 
-            template_ids = template_ids[limit:]
+    def _delay_import_external_product(self, template_ids):
+        self.with_context(company_id=self.company_id.id).with_delay(
+            description='Initial Products Import: '
+                        'Import Products Batch (create external records + auto-matching)'
+        ).import_external_product(template_ids)
 
     def integrationApiImportSaleOrderStatuses(self):
         external_records, adapter_external_data = self._import_external(
@@ -1056,7 +1064,7 @@ class SaleIntegration(models.Model):
 
         return external_templates, external_variants
 
-    def _import_external_record(self, external_model, external_data):
+    def _prepare_import_external_vals(self, external_model, external_data):
         name = external_data.get('name')
 
         # Get translation if name contains different languages
@@ -1069,29 +1077,45 @@ class SaleIntegration(models.Model):
         if not name:
             name = external_data['id']
 
-        if not external_model._pre_import_external_check(external_data, self):
-            return external_model
-
-        result = external_model.create_or_update({
+        return {
             'integration_id': self.id,
             'code': external_data['id'],
             'name': name,
             'external_reference': external_data.get('external_reference'),
-        })
+        }
+
+    def _import_external_record(self, external_model, external_data):
+        if not external_model._pre_import_external_check(external_data, self):
+            return external_model
+
+        result = external_model.create_or_update(
+            self._prepare_import_external_vals(external_model, external_data)
+        )
         result._post_import_external_one(external_data)
         return result
 
+    def _import_external_records(self, external_model, external_data_list):
+        """Bulk version of `_import_external_record()`"""
+        external_data_list = [
+            x for x in external_data_list
+            if external_model._pre_import_external_check(x, self)
+        ]
+
+        records = external_model.create_or_update_multi([
+            self._prepare_import_external_vals(external_model, x)
+            for x in external_data_list
+        ])
+        records._post_import_external_batch(external_data_list)
+
+        return external_model.browse(list(dict.fromkeys(records.ids)))
+
     def _import_external(self, model, method):
         self.ensure_one()
         adapter = self._build_adapter()
         adapter_method = getattr(adapter, method)
         adapter_external_data = adapter_method()
 
-        external_records = self.env[model]
-        for adapter_external_record in adapter_external_data:
-            external_records |= self._import_external_record(
-                external_records, adapter_external_record)
-
+        external_records = self._import_external_records(self.env[model], adapter_external_data)
         external_records._post_import_external_multi(adapter_external_data)
 
         return external_records, adapter_external_data
@@ -1263,25 +1287,34 @@ class SaleIntegration(models.Model):
     def convert_translated_field_to_integration_format(self, record, field):
         self.ensure_one()
 
-        language_mappings = self.env['integration.res.lang.mapping'].search([
-            ('integration_id', '=', self.id)
-        ])
-
+        # The record keeps its prefetch ids in the language context, so translations
+        # of the whole recordset are read with one query per language
         translations = {}
-        for language_mapping in language_mappings:
-            external_code = language_mapping.external_language_id.code
+        for external_code, language_code in self._get_language_codes():
             translations[external_code] = getattr(
-                record.with_context(lang=language_mapping.language_id.code),
+                record.with_context(lang=language_code),
                 field,
             )
 
         return translations
 
+    def _get_language_codes(self):
+        """[(external_language_code, odoo_language_code)] of the integration language mappings"""
+        return self.env['integration.res.lang.mapping']._get_language_codes(self.id)
+
     def export_images(self, template):
         self.ensure_one()
         adapter = self._build_adapter()
         export_images_data = template.to_images_export_format(self)
-        adapter.export_images(export_images_data)
+
+        external_template = template.to_external_record(self)
+        export_images_data['exported'] = external_template.get_exported_images()
+
+        exported_images = adapter.export_images(export_images_data)
+
+        # Adapters that do not track exported images return nothing
+        if exported_images is not None:
+            external_template.set_exported_images(exported_images)
 
     def export_tracking(self, pickings):
         self.ensure_one()
@@ -1413,6 +1446,8 @@ class SaleIntegration(models.Model):
     def to_dictionary(self):
         self.ensure_one()
         return {
+            'id': self.id,
+            'db_name': self.env.cr.dbname,
             'name': self.name,
             'type_api': self.type_api,
             'class': self.get_class(),
@@ -1848,6 +1883,10 @@ class SaleIntegration(models.Model):
                 _('%s\n\nTemplate:\n\t%s\n\nVariants:\n\t%s\n\nBOMS:\n\t%s')
                 % (ex.args[0], ext_template, ext_products, ext_bom_components)
             )
+        finally:
+            # Remove images downloaded to the temporary directory
+            if images.get('tmp_dir'):
+                images['tmp_dir'].cleanup()
 
     def action_run_configuration_wizard(self):
         if not self.is_configuration_wizard_exists:
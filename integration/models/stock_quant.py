@@ -1,5 +1,7 @@
 # See LICENSE file for full copyright and licensing details.
 
+from collections import defaultdict
+
 from odoo import api, models
 
 
@@ -9,18 +11,22 @@ class StockQuant(models.Model):
     @api.model
     def create(self, vals_list):
         quants = super(StockQuant, self).create(vals_list)
-        quants.trigger_export()
+        quants.trigger_export({x.id: 0 for x in quants})
         return quants
 
     def write(self, vals):
+        quantities = {x.id: x.quantity for x in self} if 'quantity' in vals else {}
         result = super(StockQuant, self).write(vals)
-        self.trigger_export()
+        self.trigger_export(quantities)
         return result
 
-    def trigger_export(self):
+    def trigger_export(self, previous_quantities=None):
         if self.env.context.get('skip_inventory_export'):
             return
 
+        if self.env['integration.inventory.dirty'].get_export_window() > 0:
+            return self._mark_inventory_dirty(previous_quantities or {})
+
         templates = self._get_templates_to_export_inventory()
 
         for template in templates:
@@ -37,6 +43,65 @@ class StockQuant(models.Model):
                 key = f'export_inventory_{integration.id}_{template.id}'
                 products.export_inventory_by_jobs(integration, key)
 
+    def _mark_inventory_dirty(self, previous_quantities):
+        """Postpone the export: mark products in the dirty set of their integrations"""
+        Dirty = self.env['integration.inventory.dirty'].sudo()
+
+        for company, quants in self._group_by_company().items():
+            integrations = self.env['sale.integration'].get_integrations(
+                'export_inventory',
+                company,
+            )
+            products = quants.product_id
+
+            for integration in integrations:
+                # Stock crossing zero is exported immediately
+                urgent_products = quants._get_zero_crossing_products(
+                    integration, previous_quantities)
+
+                # Not filtered by integration: the product can be a component of a kit
+                Dirty.mark_products(integration, products, urgent_products=urgent_products)
+
+    def _get_zero_crossing_products(self, integration, previous_quantities):
+        """Products which stock in the integration locations crossed zero with the change"""
+        Product = self.env['product.product']
+        if not integration.location_ids:
+            return Product
+
+        locations = self.env['stock.location'].search([
+            ('id', 'child_of', integration.location_ids.ids),
+        ])
+
+        # Moves between the integration locations do not change the product stock
+        deltas = defaultdict(float)
+        for quant in self:
+            if quant.id in previous_quantities and quant.location_id in locations:
+                deltas[quant.product_id.id] += quant.quantity - previous_quantities[quant.id]
+
+        if not deltas:
+            return Product
+
+        groups = self.read_group(
+            [('product_id', 'in', list(deltas)), ('location_id', 'in', locations.ids)],
+            ['quantity:sum'],
+            ['product_id'],
+            lazy=False,
+        )
+        quantities = {x['product_id'][0]: x['quantity'] for x in groups}
+
+        return Product.browse([
+            product_id for product_id, delta in deltas.items()
+            if (quantities.get(product_id, 0) - delta > 0) != (quantities.get(product_id, 0) > 0)
+        ])
+
+    def _group_by_company(self):
+        quants_by_company = {}
+        for quant in self:
+            company = quant.product_id.product_tmpl_id.company_id
+            quants_by_company[company] = quants_by_company.get(company, self.browse()) | quant
+
+        return quants_by_company
+
     def _get_templates_to_export_inventory(self):
         return (
             self.product_id.product_tmpl_id
@@ -11,6 +11,10 @@ class TemplateConverter:
         self._integration = integration
         self.env = integration.env
         self._mrp_enabled = integration.is_installed_mrp
+        self._ecommerce_fields = {}
+
+    def convert_many(self, templates):
+        return [self.convert(template) for template in templates]
 
     def convert(self, template):
         Template = self.env['product.template']
@@ -26,14 +30,11 @@ class TemplateConverter:
             'external_id': external_id,
             'type': template.type,
             'kits': self._get_kits(template),
-            'products': [x.to_export_format(self._integration) for x in variants],
+            'products': variants.to_export_format_multi(self._integration),
             'variant_count': len(variants),
         }
 
-        search_domain = Template._template_ecommerce_field_domain(self._integration, external_id)
-
-        for field in self.env['product.ecommerce.field.mapping'].\
-                search(search_domain).mapped('ecommerce_field_id'):
+        for field in self._get_template_ecommerce_fields(Template, external_id):
             result[field.technical_name] = self._integration.calculate_field_value(template, field)
 
         result_upd = Template._template_converter_update(
@@ -43,6 +44,20 @@ class TemplateConverter:
         )
         return result_upd
 
+    def _get_template_ecommerce_fields(self, Template, external_id):
+        # Set of the fields depends only on whether the template is already exported
+        is_exported = bool(external_id)
+
+        if is_exported not in self._ecommerce_fields:
+            search_domain = Template._template_ecommerce_field_domain(
+                self._integration,
+                external_id,
+            )
+            self._ecommerce_fields[is_exported] = self.env['product.ecommerce.field.mapping']\
+                .search(search_domain).mapped('ecommerce_field_id')
+
+        return self._ecommerce_fields[is_exported]
+
     def _get_kits(self, template):
         kits_data = []
         if not self._mrp_enabled:
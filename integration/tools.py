@@ -1,6 +1,7 @@
 # See LICENSE file for full copyright and licensing details.
 
 import base64
+import hashlib
 from psycopg2 import OperationalError
 from itertools import groupby
 from functools import wraps
@@ -29,6 +30,16 @@ def _guess_mimetype(data):
     return mimetype
 
 
+def _image_checksum(data):
+    if not data:
+        return None
+
+    if isinstance(data, str):
+        data = data.encode()
+
+    return hashlib.sha1(data).hexdigest()
+
+
 def not_implemented(method):
     def wrapper(self, *args, **kw):
         raise ValidationError(_(
@@ -55,6 +66,28 @@ def raise_requeue_job_on_concurrent_update(method):
     return wrapper
 
 
+def transaction_memo(env, key):
+    """
+    Dict kept until the end of the current transaction (it's dropped on commit and
+    rollback). Unlike `cr.precommit.data` it is not cleared by the flushes, so it's
+    shared by all the jobs performed in the same transaction.
+    """
+    cr = env.cr
+    memos = getattr(cr.transaction, '_integration_memos', None)
+
+    if memos is None:
+        memos = {}
+        setattr(cr.transaction, '_integration_memos', memos)
+
+        def reset():
+            setattr(cr.transaction, '_integration_memos', None)
+
+        cr.postcommit.add(reset)
+        cr.postrollback.add(reset)
+
+    return memos.setdefault(key, {})
+
+
 class TemplateHub:
     """Validate products before import."""
 
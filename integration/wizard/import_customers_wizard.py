@@ -63,6 +63,8 @@ class ImportCustomersWizard(models.TransientModel):
         factory = self.env['integration.sale.order.factory']
 
         customer, addresses = adapter.get_customer_and_addresses(customer_id)
+        factory._preload_partner_lookup(integration, [customer] + list(addresses))
+
         odoo_customer = factory._fetch_odoo_partner(integration, customer)
 
         partners = [odoo_customer]
@@ -50,12 +50,18 @@ class ImportStockLevelsWizard(models.TransientModel):
         limit = integration.get_external_block_limit()
         adapter = integration._build_adapter()
 
-        stock_levels = adapter.get_stock_levels()
-        stock_levels = [(key, value) for key, value in stock_levels.items()]
+        stock_levels = []
+        for stock_levels_block in adapter.iter_stock_levels():
+            stock_levels += [(key, value) for key, value in stock_levels_block.items()]
 
-        while stock_levels:
-            self.with_delay(
-                description='Import Stock Levels: Prepare Products'
-            ).run_import_by_blocks(stock_levels[:limit], integration)
+            while len(stock_levels) >= limit:
+                self._delay_import_by_blocks(stock_levels[:limit], integration)
+                stock_levels = stock_levels[limit:]
 
-            stock_levels = stock_levels[limit:]
+        if stock_levels:
+            self._delay_import_by_blocks(stock_levels, integration)
+
+    def _delay_import_by_blocks(self, stock_levels, integration):
+        self.with_delay(
+            description='Import Stock Levels: Prepare Products'
+        ).run_import_by_blocks(stock_levels, integration)
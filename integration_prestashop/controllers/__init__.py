@@ -1,3 +1,4 @@
 #  See LICENSE file for full copyright and licensing details.
 
 from . import prestashop_webhook
+from . import prestashop_metrics
@@ -0,0 +1,27 @@
+#  See LICENSE file for full copyright and licensing details.
+
+from odoo.http import Controller, route, request
+from odoo.exceptions import AccessDenied
+
+from ..presta import api_metrics
+
+
+class PrestashopMetrics(Controller):
+
+    @route('/integration/prestashop/metrics', type='http', auth='user', methods=['GET'])
+    def prestashop_api_metrics(self):
+        """
+        Webservice requests statistics of the current worker in Prometheus text format.
+        Each worker keeps its own statistics.
+        """
+        if not request.env.user.has_group('base.group_system'):
+            raise AccessDenied()
+
+        text = api_metrics.to_prometheus(db_name=request.env.cr.dbname)
+
+        headers = [
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+            ('Content-Length', len(text)),
+        ]
+
+        return request.make_response(text, headers=headers)
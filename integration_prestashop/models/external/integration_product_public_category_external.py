@@ -16,6 +16,20 @@ class IntegrationProductPublicCategoryExternal(models.Model):
     def _post_import_external_one(self, adapter_external_record):
         self.is_root_category = adapter_external_record.get('is_root_category', False)
 
+    def _post_import_external_batch(self, adapter_external_records):
+        root_categories = self.browse([
+            record.id
+            for record, adapter_external_record in zip(self, adapter_external_records)
+            if adapter_external_record.get('is_root_category', False)
+        ])
+
+        root_categories.filtered(lambda x: not x.is_root_category).write({
+            'is_root_category': True,
+        })
+        (self - root_categories).filtered('is_root_category').write({
+            'is_root_category': False,
+        })
+
     def _get_parent_recursively(self, parents=None):
         parent_list = parents or list()
 
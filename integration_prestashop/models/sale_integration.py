@@ -130,12 +130,38 @@ class SaleIntegration(models.Model):
 
         if self.is_prestashop():
             adapter = self._build_adapter()
+            adapter.clear_reference_cache()
             ps_configuration = adapter._client.model('configuration')
             ps_timezone = ps_configuration.search({'name': 'PS_TIMEZONE'})[0].value
             self.set_settings_value('PS_TIMEZONE', ps_timezone)
 
         return result
 
+    def get_prestashop_api_metrics(self):
+        """Webservice requests statistics of the integration collected by the current worker"""
+        self.ensure_one()
+
+        if not self.is_prestashop():
+            return []
+
+        return self._build_adapter().get_api_metrics()
+
+    def integrationApiImportDeliveryMethods(self):
+        external_records = super(SaleIntegration, self).integrationApiImportDeliveryMethods()
+
+        if self.is_prestashop():
+            self._build_adapter().clear_reference_cache()
+
+        return external_records
+
+    def integrationApiImportTaxes(self):
+        external_records = super(SaleIntegration, self).integrationApiImportTaxes()
+
+        if self.is_prestashop():
+            self._build_adapter().clear_reference_cache()
+
+        return external_records
+
     def _retrieve_webhook_routes(self):
         if self.is_prestashop():
             routes = {
@@ -2,3 +2,6 @@
 
 from .client import Client
 from .base_model import BaseModel, PRESTASHOP
+from .session_pool import session_pool
+from .reference_cache import reference_cache
+from .api_metrics import api_metrics
@@ -0,0 +1,200 @@
+#  See LICENSE file for full copyright and licensing details.
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.count = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def add(self, latency, bytes_in, bytes_out):
+        self.count += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[index] += 1
+                break
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'latency_sum': round(self.latency_sum, 6),
+            'latency_max': round(self.latency_max, 6),
+            'latency_buckets': dict(zip(LATENCY_BUCKETS, self.buckets)),
+        }
+
+
+class ApiMetrics:
+    """
+    Per-process statistics of the PrestaShop webservice requests.
+
+    Statistics are grouped by `(db_name, integration_id)` scope and by
+    `(resource, method, status)` of the request. Requests failed without a response
+    (connection errors, timeouts) are registered with the `error` / `timeout` status.
+    Every Odoo worker keeps its own statistics, they are not shared between
+    processes and are reset on restart.
+    """
+
+    def __init__(self):
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+    def make_hook(self, scope_key):
+        """`requests` response hook that registers the request in the scope"""
+        def hook(response, *args, **kwargs):
+            self.observe(scope_key, response, stream=kwargs.get('stream'))
+            return response
+
+        return hook
+
+    def observe(self, scope_key, response, stream=False):
+        request = response.request
+
+        if stream:
+            # The body is not read yet, rely on the announced size
+            bytes_in = int(response.headers.get('Content-Length') or 0)
+        else:
+            bytes_in = len(response.content or b'')
+
+        key = (self._get_resource(request.url), request.method, str(response.status_code))
+        self._add(
+            scope_key, key, response.elapsed.total_seconds(), bytes_in, self._body_size(request),
+        )
+
+    def observe_failure(self, scope_key, method, url, exception, latency):
+        """Register a request which failed without a response"""
+        status = 'timeout' if isinstance(exception, requests.Timeout) else 'error'
+        request = getattr(exception, 'request', None)
+        bytes_out = self._body_size(request) if request is not None else 0
+
+        key = (self._get_resource(url), method.upper(), status)
+        self._add(scope_key, key, latency, 0, bytes_out)
+
+    def _add(self, scope_key, key, latency, bytes_in, bytes_out):
+        with self._lock:
+            scope = self._scopes.setdefault(scope_key, {})
+            stats = scope.get(key)
+            if not stats:
+                stats = scope[key] = RequestStats()
+
+            stats.add(latency, bytes_in, bytes_out)
+
+    def get_stats(self, scope_key):
+        """
+        [{
+            'resource': 'products',
+            'method': 'GET',
+            'status': '200',
+            'count': 12,
+            'bytes_in': 120345,
+            'bytes_out': 0,
+            'latency_sum': 3.2,
+            'latency_max': 0.9,
+            'latency_buckets': {0.05: 0, 0.1: 2, ...},
+        }]
+        """
+        with self._lock:
+            scope = self._scopes.get(scope_key, {})
+            return [
+                dict(resource=resource, method=method, status=status, **stats.to_dict())
+                for (resource, method, status), stats in sorted(scope.items())
+            ]
+
+    def reset(self, scope_key):
+        with self._lock:
+            self._scopes.pop(scope_key, None)
+
+    def to_prometheus(self, db_name=None):
+        """Statistics of all the integrations (of the database) in Prometheus text format"""
+        with self._lock:
+            series = [
+                (scope_key, key, stats.to_dict())
+                for scope_key, scope in sorted(self._scopes.items(), key=lambda x: str(x[0]))
+                if db_name is None or scope_key[0] == db_name
+                for key, stats in sorted(scope.items())
+            ]
+
+        counters = [
+            ('requests_total', 'count', 'Number of webservice requests'),
+            ('received_bytes_total', 'bytes_in', 'Bytes received from webservice'),
+            ('sent_bytes_total', 'bytes_out', 'Bytes sent to webservice'),
+        ]
+
+        lines = []
+        for name, field, description in counters:
+            name = 'prestashop_api_%s' % name
+            lines += [
+                '# HELP %s %s' % (name, description),
+                '# TYPE %s counter' % name,
+            ]
+            for scope_key, key, stats in series:
+                lines.append('%s{%s} %s' % (name, self._labels(scope_key, key), stats[field]))
+
+        name = 'prestashop_api_request_duration_seconds'
+        lines += [
+            '# HELP %s Latency of webservice requests' % name,
+            '# TYPE %s histogram' % name,
+        ]
+        for scope_key, key, stats in series:
+            labels = self._labels(scope_key, key)
+
+            cumulative = 0
+            for bound, amount in stats['latency_buckets'].items():
+                cumulative += amount
+                lines.append('%s_bucket{%s,le="%s"} %s' % (name, labels, bound, cumulative))
+
+            lines += [
+                '%s_bucket{%s,le="+Inf"} %s' % (name, labels, stats['count']),
+                '%s_sum{%s} %s' % (name, labels, stats['latency_sum']),
+                '%s_count{%s} %s' % (name, labels, stats['count']),
+            ]
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _labels(scope_key, key):
+        db_name, integration_id = scope_key
+        resource, method, status = key
+        return 'db="%s",integration="%s",resource="%s",method="%s",status="%s"' % (
+            db_name, integration_id, resource, method, status,
+        )
+
+    @staticmethod
+    def _body_size(request):
+        body = request.body
+        if not body:
+            return 0
+        if isinstance(body, str):
+            return len(body.encode('utf-8'))
+        if isinstance(body, bytes):
+            return len(body)
+        return int(request.headers.get('Content-Length') or 0)
+
+    @staticmethod
+    def _get_resource(url):
+        # https://shop.com/api/products/12?display=full -> products
+        path = urlsplit(url).path
+        path = path.split('/api/', 1)[-1] if '/api/' in path else ''
+        return path.strip('/').split('/')[0] or 'api'
+
+
+api_metrics = ApiMetrics()
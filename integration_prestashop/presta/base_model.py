@@ -1,8 +1,11 @@
 #  See LICENSE file for full copyright and licensing details.
 
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 import logging
 
+from .session_pool import POOL_MAXSIZE
+
 
 _logger = logging.getLogger(__name__)
 
@@ -13,6 +16,8 @@ PRESTASHOP = 'prestashop'
 class BaseModel:
     _name = None
     _required_fields = []
+    # Fields PrestaShop requires in every edit request, even on partial updates
+    _mandatory_fields = []
     _skip_if_absent_in_schema = []
 
     _data = {}
@@ -26,11 +31,13 @@ class BaseModel:
         shop_ids=None,
         default_language_id=None,
         data_block_size=None,
+        data_block_concurrency=None,
     ):
         self._ids = []
         self._to_update = {}
         self._default_language_id = default_language_id
         self._data_block_size = data_block_size
+        self._data_block_concurrency = data_block_concurrency or 1
         self._lang_fields = []
         self._lang_id = []
 
@@ -93,7 +100,15 @@ class BaseModel:
         return records
 
     def save(self):
+        updated_fields = set(self._to_update) | {
+            x._plural_name for x in self._to_update.values() if isinstance(x, BaseModel)
+        }
         vals = self._prepare_save_vals()
+
+        if self.id and self._client.partial_update:
+            vals = self._strip_not_updated(vals, updated_fields)
+            self._fill_mandatory_fields(vals)
+
         result = self._save(vals)
         return result
 
@@ -184,26 +199,82 @@ class BaseModel:
 
     def search_read_by_blocks(self, filters, fields=None, skip_translation=False, **kwargs):
         response = []
-        last = 0
+        for res in self.iter_search_read_by_blocks(
+            filters,
+            fields=fields,
+            skip_translation=skip_translation,
+            **kwargs,
+        ):
+            response += res
+
+        return response
+
+    def iter_search_read_by_blocks(self, filters, fields=None, skip_translation=False, **kwargs):
+        """
+        Read records page by page (`limit=offset,data_block_size`) and yield every page
+        as soon as it is received, so the caller can process and discard it.
+
+        When `data_block_concurrency` is greater than 1 the amount of records is read
+        first (ids only), then the pages are requested in parallel and yielded in the
+        original order. Reading stops as soon as a page is not full, so no trailing
+        empty request is needed.
+        """
         step = self._data_block_size
-        while True:
-            res = self.search_read(
+        concurrency = min(self._data_block_concurrency, POOL_MAXSIZE)
+
+        def read_block(offset):
+            return self.search_read(
                 filters=filters,
                 fields=fields,
                 skip_translation=skip_translation,
-                limit='%d,%d' % (last, step),
+                limit='%d,%d' % (offset, step),
                 **kwargs,
             )
+
+        if concurrency <= 1:
+            yield from self._iter_blocks_sequential(read_block, step)
+            return
+
+        # Parallel pages must be read with the stable order
+        kwargs.setdefault('sort', '[id_ASC]')
+
+        total = len(self.search_read(
+            filters=filters, fields=['id'], skip_translation=True, **kwargs,
+        ))
+        offsets = list(range(0, total, step))
+
+        received = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index in range(0, len(offsets), concurrency):
+                pages = list(executor.map(read_block, offsets[index:index + concurrency]))
+                received += sum(len(res) for res in pages)
+
+                _logger.info('PrestaShop: model "%s" method "search_read_by_blocks" '
+                             'records received: %d' % (self._name, received))
+
+                for res in pages:
+                    if res:
+                        yield res
+
+                if any(len(res) < step for res in pages):
+                    break
+
+    def _iter_blocks_sequential(self, read_block, step):
+        received = 0
+        last = 0
+        while True:
+            res = read_block(last)
             last += step
-            response += res
+            received += len(res)
 
             _logger.info('PrestaShop: model "%s" method "search_read_by_blocks" '
-                         'records received: %d' % (self._name, len(response)))
+                         'records received: %d' % (self._name, received))
 
-            if not res:
-                break
+            if res:
+                yield res
 
-        return response
+            if len(res) < step:
+                break
 
     def refresh(self):
         data = self.read()
@@ -300,17 +371,53 @@ class BaseModel:
             return self._name + 's'
 
     def _prepare_save_vals(self):
-        if self.id:
+        if self.id and not self._client.partial_update:
             schema = self._client.get(self._plural_name, self.id)
         else:
-            schema = self._client.get(
-                self._plural_name, options={'schema': 'blank'}
-            )
+            schema = self._client.get_blank_schema(self._plural_name)
+
+            if self.id:
+                schema[self._name]['id'] = str(self.id)
 
         vals = self._fill_schema(schema)
 
         return vals
 
+    def _strip_not_updated(self, vals, updated_fields):
+        """
+        Keep only `id` and updated fields (with their associations) in the values,
+        PrestaShop leaves the absent fields of the edited record unchanged
+        """
+        object_data = vals[self._name]
+
+        for key in list(object_data):
+            if key == 'associations':
+                associations = object_data[key]
+                for name in list(associations):
+                    if name not in updated_fields:
+                        del associations[name]
+
+                if not associations:
+                    del object_data[key]
+            elif key not in updated_fields and key not in ('id', 'attrs'):
+                del object_data[key]
+
+        return vals
+
+    def _fill_mandatory_fields(self, vals):
+        """Keep required and mandatory fields not being updated at their stored values"""
+        object_data = vals[self._name]
+        missing_fields = [
+            x for x in self._required_fields + self._mandatory_fields if x not in object_data
+        ]
+        if not missing_fields:
+            return
+
+        stored_data = self.read()
+        for field_name in missing_fields:
+            if field_name in stored_data:
+                object_data[field_name] = stored_data[field_name]
+
     def _fill_schema(self, schema):
         vals = deepcopy(schema)
 
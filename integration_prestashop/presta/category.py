@@ -9,7 +9,7 @@ import re
 class Category(BaseModel):
 
     def create(self, vals):
-        categories = self._client.get('categories', options={'schema': 'blank'})
+        categories = self._client.get_blank_schema('categories')
 
         categories['category']['active'] = IS_TRUE
         BaseModel._fill_translated_field(vals['name'], categories['category']['name'])
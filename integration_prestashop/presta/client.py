@@ -1,23 +1,34 @@
 #  See LICENSE file for full copyright and licensing details.
 
 import logging
+from copy import deepcopy
 from prestapyt import PrestaShopWebServiceDict
 from .base_model import BaseModel
 from .category import Category
 from .product import Product
 from .combination import Combination
 from .image import Image
+from .reference_cache import reference_cache
 
 
 _logger = logging.getLogger(__name__)
 
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
 class Client(PrestaShopWebServiceDict):
 
     default_language_id = None
     id_group_shop = None
     data_block_size = None
+    data_block_concurrency = None
     shop_ids = []
+    partial_update = False
+
+    # Scope of the reference data cache, blank schemas are not cached without it
+    cache_scope = None
+    cache_fingerprint = None
 
     classes = {
         'category': Category,
@@ -26,8 +37,8 @@ class Client(PrestaShopWebServiceDict):
         'image': Image,
     }
 
-    def __init__(self, api_url, api_key):
-        super(Client, self).__init__(api_url=api_url, api_key=api_key)
+    def __init__(self, api_url, api_key, session=None):
+        super(Client, self).__init__(api_url=api_url, api_key=api_key, session=session)
 
     def add(self, resource, content=None, files=None, options=None):
         _logger.debug(
@@ -48,6 +59,37 @@ class Client(PrestaShopWebServiceDict):
         )
         return super(Client, self).edit(resource, content, options)
 
+    def get_blank_schema(self, resource):
+        """Blank schema of the resource, the same for all records of one shop"""
+        def load():
+            return self.get(resource, options={'schema': 'blank'})
+
+        if not self.cache_scope:
+            return load()
+
+        schema = reference_cache.get_or_load(
+            self.cache_scope,
+            self.cache_fingerprint,
+            ('schema_blank', resource),
+            load,
+        )
+        return deepcopy(schema)
+
+    def download(self, url, file_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """Stream the response body to the file, so it is never kept in memory as a whole"""
+        _logger.debug('download() url=%s', url)
+
+        with self.client.get(url, headers=self.client.headers, stream=True) as response:
+            if response.status_code != 200:
+                self._check_status_code(response.status_code, response.content)
+                return False
+
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+
+        return True
+
     def model(self, name):
         cls = self.classes.get(name)
         if not cls:
@@ -59,6 +101,7 @@ class Client(PrestaShopWebServiceDict):
             shop_ids=self.shop_ids,
             default_language_id=self.default_language_id,
             data_block_size=self.data_block_size,
+            data_block_concurrency=self.data_block_concurrency,
         )
         instance._name = name  # TODO: bad
 
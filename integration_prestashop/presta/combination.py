@@ -5,6 +5,11 @@ from .base_model import BaseModel
 
 class Combination(BaseModel):
 
+    _mandatory_fields = [
+        'id_product',
+        'minimal_quantity',
+    ]
+
     _product_id = None
 
     def _save(self, vals):
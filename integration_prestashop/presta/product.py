@@ -13,6 +13,11 @@ class Product(BaseModel):
         'name',
     ]
 
+    _mandatory_fields = [
+        'price',
+        'link_rewrite',
+    ]
+
     _skip_if_absent_in_schema = [
         'state',
     ]
@@ -109,7 +114,8 @@ class Product(BaseModel):
                 pass
 
     def _get_value(self, product, name):
-        value = product['product'][name]
+        # The field can be absent in the partial update
+        value = product['product'].get(name)
         if isinstance(value, dict):
             value = value['value']
 
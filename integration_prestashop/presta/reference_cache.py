@@ -0,0 +1,64 @@
+#  See LICENSE file for full copyright and licensing details.
+
+import logging
+import threading
+import time
+
+
+_logger = logging.getLogger(__name__)
+
+
+REFERENCE_CACHE_TTL = 3600  # seconds
+
+
+class ReferenceCache:
+    """
+    Per-process TTL cache for slow-changing PrestaShop reference data
+    (currencies, carriers tax groups, tax rules, configuration values, blank schemas).
+
+    Values are scoped by `(db_name, integration_id)` and the whole scope is dropped
+    when the integration URL or webservice key changes. Cached values are shared
+    between jobs, so they must never be modified by the caller.
+    """
+
+    def __init__(self, ttl=REFERENCE_CACHE_TTL):
+        self._ttl = ttl
+        self._scopes = {}
+        self._lock = threading.RLock()
+
+    def get_or_load(self, scope_key, fingerprint, key, loader):
+        with self._lock:
+            values = self._get_scope(scope_key, fingerprint)
+            cached = values.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+        value = loader()
+
+        with self._lock:
+            values = self._get_scope(scope_key, fingerprint)
+            values[key] = (time.monotonic() + self._ttl, value)
+
+        return value
+
+    def invalidate(self, scope_key, key=None):
+        with self._lock:
+            if key is None:
+                self._scopes.pop(scope_key, None)
+                return
+
+            __, values = self._scopes.get(scope_key, (None, {}))
+            values.pop(key, None)
+
+    def _get_scope(self, scope_key, fingerprint):
+        scope = self._scopes.get(scope_key)
+        if not scope or scope[0] != fingerprint:
+            if scope:
+                _logger.debug('PrestaShop: dropping reference data cache of %s', scope_key)
+            scope = (fingerprint, {})
+            self._scopes[scope_key] = scope
+
+        return scope[1]
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,172 @@
+#  See LICENSE file for full copyright and licensing details.
+
+import hashlib
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .api_metrics import api_metrics
+
+
+_logger = logging.getLogger(__name__)
+
+
+POOL_MAXSIZE = 10
+POOL_IDLE_TIMEOUT = 300  # seconds
+
+
+def connection_fingerprint(api_url, api_key):
+    value = '%s|%s' % (api_url, api_key)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+class TrackedSession(requests.Session):
+    """`requests.Session` reporting every request to the pooled session owning it"""
+
+    def __init__(self, pooled, key):
+        super().__init__()
+        self.pooled = pooled
+        self.key = key
+
+    def request(self, method, url, *args, **kwargs):
+        self.pooled.begin_request()
+        start = time.monotonic()
+        try:
+            return super().request(method, url, *args, **kwargs)
+        except requests.RequestException as ex:
+            # Failed requests never reach the response hooks
+            api_metrics.observe_failure(self.key, method, url, ex, time.monotonic() - start)
+            raise
+        finally:
+            self.pooled.end_request()
+
+
+class PooledSession:
+    """Keep-alive `requests.Session` shared by all the clients of one integration."""
+
+    def __init__(self, key, api_key, fingerprint, maxsize=POOL_MAXSIZE):
+        self.fingerprint = fingerprint
+        self.last_used = time.monotonic()
+        self.checkouts = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=maxsize,
+            pool_block=True,
+        )
+
+        self.session = TrackedSession(self, key)
+        self.session.auth = (api_key, '')
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.hooks['response'].append(api_metrics.make_hook(key))
+
+    def touch(self):
+        self.last_used = time.monotonic()
+        self.checkouts += 1
+
+    def begin_request(self):
+        with self._lock:
+            self.in_flight += 1
+            self.last_used = time.monotonic()
+
+    def end_request(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+    def is_idle(self, now, timeout):
+        # A session with running requests is never idle, whatever their duration
+        with self._lock:
+            return not self.in_flight and now - self.last_used > timeout
+
+    def get_stats(self):
+        opened = requests_count = 0
+
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            connection_pool = pools.get(key)
+            if connection_pool is None:
+                continue
+
+            opened += connection_pool.num_connections
+            requests_count += connection_pool.num_requests
+
+        return {
+            'checkouts': self.checkouts,
+            'requests': requests_count,
+            'connections_opened': opened,
+            'connections_reused': max(requests_count - opened, 0),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class SessionPool:
+    """
+    Per-process registry of keep-alive sessions.
+
+    Sessions are keyed by `(db_name, integration_id)` and are re-created when the
+    integration URL or webservice key changes. Sessions without running requests
+    that were not used for `idle_timeout` seconds are closed on the next checkout.
+    """
+
+    def __init__(self, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self._maxsize = maxsize
+        self._idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.RLock()
+
+    def get_session(self, key, api_url, api_key):
+        fingerprint = connection_fingerprint(api_url, api_key)
+
+        with self._lock:
+            self._evict_idle()
+
+            pooled = self._sessions.get(key)
+            if pooled and pooled.fingerprint != fingerprint:
+                _logger.info(
+                    'PrestaShop: connection settings of %s were changed, dropping session', key)
+                self._drop(key)
+                pooled = None
+
+            if not pooled:
+                pooled = PooledSession(key, api_key, fingerprint, maxsize=self._maxsize)
+                self._sessions[key] = pooled
+
+            pooled.touch()
+            return pooled.session
+
+    def invalidate(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def get_stats(self, key):
+        with self._lock:
+            pooled = self._sessions.get(key)
+            return pooled.get_stats() if pooled else {}
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        idle_keys = [
+            key for key, pooled in self._sessions.items()
+            if pooled.is_idle(now, self._idle_timeout)
+        ]
+
+        for key in idle_keys:
+            _logger.debug('PrestaShop: closing idle session %s', key)
+            self._drop(key)
+
+    def _drop(self, key):
+        pooled = self._sessions.pop(key, None)
+        if pooled:
+            pooled.close()
+
+
+session_pool = SessionPool()
@@ -1,10 +1,13 @@
 # See LICENSE file for full copyright and licensing details.
 
+import os
 import json
+import tempfile
 import itertools
 import logging
 from decimal import Decimal
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
 from itertools import groupby
 
 from prestapyt import PrestaShopWebServiceError
@@ -17,8 +20,9 @@ from odoo.exceptions import UserError
 from odoo.tools import frozendict
 from ..integration.exceptions import ApiImportError
 
-from .presta import Client, PRESTASHOP  # noqa
+from .presta import Client, PRESTASHOP, session_pool, reference_cache, api_metrics  # noqa
 from .presta.base_model import BaseModel
+from .presta.session_pool import connection_fingerprint
 
 
 _logger = logging.getLogger(__name__)
@@ -30,6 +34,16 @@ PRODUCT_TYPE_MAP = {
     'virtual': 'service',
 }
 ROOT_CMS_PAGE_CATEGORY_ID = '1'
+BATCH_IDS_LIMIT = 100  # Amount of ids in a single `filter[id]=[1|2|3]` request
+IMAGE_DOWNLOAD_CONCURRENCY = 4
+# Fields PrestaShop webservice demands on `stock_available` update, other fields are kept
+STOCK_AVAILABLE_REQUIRED_FIELDS = [
+    'id_product',
+    'id_product_attribute',
+    'quantity',
+    'depends_on_stock',
+    'out_of_stock',
+]
 
 
 # TODO: all reading through pagination
@@ -54,6 +68,19 @@ class PrestaShopApiClient(AbsApiClient):
         ('import_products_filter', 'Import Products Filter', '{"active": "1"}'),
         ('id_group_shop', 'Shop Group where export products', ''),
         ('shop_ids', 'Shop ids in id_group_shop separated by comma', ''),
+        (
+            'data_block_concurrency',
+            'Number of data blocks requested in parallel when reading big lists',
+            '1',
+        ),
+        (
+            'partial_update',
+            (
+                'Send only changed fields when updating existing records (1 - yes, 0 - no).'
+                ' All fields required by PrestaShop must be exported'
+            ),
+            IS_FALSE,
+        ),
         (
             'PS_TIMEZONE',
             (
@@ -75,9 +102,14 @@ class PrestaShopApiClient(AbsApiClient):
             admin_url += '/index.php'
         self.admin_url = admin_url
 
+        self._session_key = (self._settings.get('db_name'), self._settings.get('id'))
+        self._connection_fingerprint = connection_fingerprint(api_url, api_key)
+        session = session_pool.get_session(self._session_key, api_url, api_key)
+
         self._client = Client(
             api_url,
             api_key,
+            session=session,
         )
 
         self._language_id = self.get_settings_value('language_id')
@@ -94,6 +126,12 @@ class PrestaShopApiClient(AbsApiClient):
         self._client.id_group_shop = id_group_shop
         self._client.shop_ids = shop_ids
         self._client.data_block_size = self._settings['data_block_size']
+        self._client.data_block_concurrency = int(
+            self.get_settings_value('data_block_concurrency') or 1
+        )
+        self._client.partial_update = self.get_settings_value('partial_update') == IS_TRUE
+        self._client.cache_scope = self._session_key
+        self._client.cache_fingerprint = self._connection_fingerprint
 
     def check_connection(self):
         resources = self._client.get('')
@@ -103,6 +141,38 @@ class PrestaShopApiClient(AbsApiClient):
     def get_api_resources(self):
         return self._client.get('')
 
+    def get_connection_stats(self):
+        """Counters of the keep-alive session used by this integration in the current worker:
+            {
+                'checkouts': 12,
+                'requests': 240,
+                'connections_opened': 2,
+                'connections_reused': 238,
+            }
+        """
+        return session_pool.get_stats(self._session_key)
+
+    def reset_connection(self):
+        session_pool.invalidate(self._session_key)
+
+    def get_api_metrics(self):
+        """Webservice requests statistics of this integration in the current worker"""
+        return api_metrics.get_stats(self._session_key)
+
+    def reset_api_metrics(self):
+        api_metrics.reset(self._session_key)
+
+    def clear_reference_cache(self, key=None):
+        reference_cache.invalidate(self._session_key, key)
+
+    def _get_cached(self, key, loader):
+        return reference_cache.get_or_load(
+            self._session_key,
+            self._connection_fingerprint,
+            key,
+            loader,
+        )
+
     def get_delivery_methods(self):
         delivery_methods = self._client.model('carrier').search_read(
             filters={'deleted': IS_FALSE},
@@ -141,6 +211,30 @@ class PrestaShopApiClient(AbsApiClient):
 
         return value and value[0] if isinstance(value, list) else value
 
+    def _get_cached_configuration_value(self, name):
+        def load():
+            configuration = self.get_configuration(name)
+            return configuration and configuration['value'] or IS_FALSE
+
+        return self._get_cached(('configuration', name), load)
+
+    def _get_currency(self, currency_id):
+        def load():
+            currencies = self._client.model('currency').search_read(
+                filters={},
+                fields=['id', 'iso_code'],
+            )
+            return {x['id']: x for x in currencies}
+
+        currency = self._get_cached('currencies', load).get(currency_id)
+
+        if currency is None:
+            # Currency could be added after the cache was filled
+            self.clear_reference_cache('currencies')
+            currency = self._get_cached('currencies', load).get(currency_id, dict())
+
+        return currency
+
     def get_single_tax(self, tax_id):
         taxes = self.get_taxes()
         tax_list = [x for x in taxes if x['id'] == tax_id]
@@ -478,14 +572,21 @@ class PrestaShopApiClient(AbsApiClient):
         return order_states
 
     def get_product_template_ids(self):
-        template_ids = self._client.model('product').search_read_by_blocks(
+        template_ids = []
+        for template_ids_block in self.iter_product_template_ids():
+            template_ids += template_ids_block
+
+        return template_ids
+
+    def iter_product_template_ids(self):
+        template_pages = self._client.model('product').iter_search_read_by_blocks(
             filters=self._get_product_filter_hook(),
             fields=self._get_product_fields_hook(['id']),
         )
 
-        template_ids = self._filter_templates_hook(template_ids)
-
-        return template_ids and [x['id'] for x in template_ids] or []
+        for templates in template_pages:
+            templates = self._filter_templates_hook(templates)
+            yield [x['id'] for x in templates]
 
     def get_product_templates(self, template_ids):
         product_templates = self._client.model('product').search_read(
@@ -950,28 +1051,53 @@ class PrestaShopApiClient(AbsApiClient):
         product_id = images['template']['id']
         variant = self._client.model('product').get(product_id)
 
-        presta_images = variant.get_images()
-        for image in presta_images:
-            image.delete()
+        presta_images = {str(x.id): x for x in variant.get_images()}
+        images_to_export = self._get_images_to_export(images)
+
+        # Images exported before and still present in PrestaShop
+        exported_images = {
+            checksum: image_id for checksum, image_id in images.get('exported', {}).items()
+            if image_id in presta_images
+        }
+
+        # The first uploaded image becomes the cover one, so all images are uploaded
+        # again when the cover image was changed
+        if next(iter(exported_images), None) != next(iter(images_to_export), None):
+            exported_images = {}
+
+        kept_image_ids = {
+            exported_images[x] for x in images_to_export if x in exported_images
+        }
+
+        for image_id, image in presta_images.items():
+            if image_id not in kept_image_ids:
+                image.delete()
 
-        template_default_image = images['template']['default']
-        if template_default_image:
-            default_image = template_default_image['data']
-            variant.add_image(default_image)
+        result = {}
+        for checksum, image_data in images_to_export.items():
+            if checksum in exported_images:
+                result[checksum] = exported_images[checksum]
+            else:
+                result[checksum] = str(variant.add_image(image_data))
 
-        for extra_image in images['template']['extra']:
-            extra_image_data = extra_image['data']
-            variant.add_image(extra_image_data)
+        return result
 
-        for product in images['products']:
-            product_default_image = product['default']
-            if product_default_image:
-                product_image = product_default_image['data']
-                variant.add_image(product_image)
+    @staticmethod
+    def _get_images_to_export(images):
+        """
+        Ordered dictionary {checksum: data} of the template and variants images,
+        starting with the template default image. Duplicated images are exported once.
+        """
+        result = {}
 
-            for product_extra_image in product['extra']:
-                product_extra_image_data = product_extra_image['data']
-                variant.add_image(product_extra_image_data)
+        for record in [images['template']] + images['products']:
+            record_images = [record['default']] + record['extra']
+
+            for image in record_images:
+                if image and image['checksum']:
+                    result.setdefault(image['checksum'], image['data'])
+
+        return result
 
     def export_attribute(self, attribute):
         product_option = self._client.model('product_option')
@@ -1060,83 +1186,146 @@ class PrestaShopApiClient(AbsApiClient):
         if not isinstance(orders, list):
             orders = [orders]
 
+        order_ids = [order['attrs']['id'] for order in orders]
+
         input_files = []
-        for order in orders:
-            order_id = order['attrs']['id']
-            data = self._get_input_file_data(order_id)
-            input_file = {
-                'id': order['attrs']['id'],
-                'data': data,
-            }
-            input_files.append(input_file)
+        for index in range(0, len(order_ids), BATCH_IDS_LIMIT):
+            order_ids_block = order_ids[index:index + BATCH_IDS_LIMIT]
+            input_files_data = self._get_input_file_data_batch(order_ids_block)
 
-        return input_files
+            for order_id in order_ids_block:
+                if order_id not in input_files_data:
+                    continue
 
-    def _get_messages_list(self, order_id):
-        options = {
-            'filter[id_order]': order_id,
-        }
-        messages = self._client.get('messages', options=options)['messages']
-        if messages:
-            messages = messages['message']
-        else:
-            messages = []
+                input_file = {
+                    'id': order_id,
+                    'data': input_files_data[order_id],
+                }
+                input_files.append(input_file)
 
-        if not isinstance(messages, list):
-            messages = [messages]
+        return input_files
 
-        message_list = []
-        for message in messages:
-            message_id = message['attrs']['id']
-            message_data = self._client.get(
-                'messages', message_id
-            )['message']
-            message_list.append(message_data)
+    def _search_read_by_values(self, model_name, field_name, values, fields=None):
+        """
+        Read records with a single `filter[field_name]=[a|b|c]` request per block of values.
+        Blocks are kept small enough to avoid the 414 Request-URI Too Large error.
+        """
+        values = sorted(set(str(x) for x in values if x and x != IS_FALSE))
+
+        records = []
+        for index in range(0, len(values), BATCH_IDS_LIMIT):
+            values_block = values[index:index + BATCH_IDS_LIMIT]
+            records += self._client.model(model_name).search_read(
+                filters={field_name: '[%s]' % '|'.join(values_block)},
+                fields=fields,
+                skip_translation=True,
+            )
 
-        return message_list
+        return records
 
     def _get_input_file_data(self, order_id):
-        order = self._client.get('orders', order_id)['order']
+        input_files_data = self._get_input_file_data_batch([order_id])
+        if order_id not in input_files_data:
+            raise UserError(_('Order with id "%s" does not exist in PrestaShop') % order_id)
 
-        try:
-            customer = self._client.get('customers', order['id_customer'])['customer']
-        except PrestaShopWebServiceError:
-            customer = {}
+        return input_files_data[order_id]
 
-        try:
-            delivery_address = self._client.get(
-                'addresses', order['id_address_delivery'])['address']
-        except PrestaShopWebServiceError:
-            delivery_address = {}
+    def _get_input_file_data_batch(self, order_ids):
+        """
+        Read orders with all related data in a few requests per resource and join them
+        in memory. Returns dictionary {order_id: input_file_data}
+        """
+        orders = {x['id']: x for x in self._search_read_by_values('order', 'id', order_ids)}
 
-        try:
-            invoice_address = self._client.get('addresses', order['id_address_invoice'])['address']
-        except PrestaShopWebServiceError:
-            invoice_address = {}
-
-        input_file_data = {
-            'order': order,
-            'customer': customer,
-            'delivery_address': delivery_address,
-            'invoice_address': invoice_address,
-            'messages': self._get_messages_list(order_id),
-            'payment_transactions': self._get_payment_transactions(order['reference'])
+        missing_order_ids = set(order_ids) - set(orders)
+        if missing_order_ids:
+            _logger.warning(
+                'PrestaShop: orders %s were not found and will be skipped',
+                ', '.join(sorted(missing_order_ids)),
+            )
+
+        customers = {
+            x['id']: x for x in self._search_read_by_values(
+                'customer',
+                'id',
+                [x['id_customer'] for x in orders.values()],
+            )
+        }
+
+        address_ids = []
+        for order in orders.values():
+            address_ids += [order['id_address_delivery'], order['id_address_invoice']]
+
+        addresses = {
+            x['id']: x for x in self._search_read_by_values('address', 'id', address_ids)
         }
-        return input_file_data
+
+        messages = defaultdict(list)
+        for message in self._search_read_by_values('message', 'id_order', order_ids):
+            messages[message['id_order']].append(message)
+
+        payments = defaultdict(list)
+        for payment in self._search_read_by_values(
+            'order_payment',
+            'order_reference',
+            [x['reference'] for x in orders.values()],
+            fields=[
+                'amount', 'transaction_id', 'date_add', 'id_currency',
+                'payment_method', 'order_reference',
+            ],
+        ):
+            payments[payment['order_reference']].append(payment)
+
+        result = {}
+        for order_id, order in orders.items():
+            result[order_id] = {
+                'order': order,
+                'customer': customers.get(order['id_customer'], {}),
+                'delivery_address': addresses.get(order['id_address_delivery'], {}),
+                'invoice_address': addresses.get(order['id_address_invoice'], {}),
+                'messages': messages.get(order_id, []),
+                'payment_transactions': self._prepare_payment_transactions(
+                    order['reference'],
+                    payments.get(order['reference'], []),
+                ),
+            }
+
+        return result
 
     def _get_carrier_tax_ids(self, carrier_id, country_id, state_id, postcode):
         if not carrier_id or carrier_id == IS_FALSE:
             return list(), IS_FALSE
 
-        tax_rule_group = self._client.model('carrier').search_read(
-            filters={'id': carrier_id},
-            fields=['id_tax_rules_group'],
-        )
+        def load():
+            tax_rule_group = self._client.model('carrier').search_read(
+                filters={'id': carrier_id},
+                fields=['id_tax_rules_group'],
+            )
+            return tax_rule_group and tax_rule_group[0]['id_tax_rules_group']['value']
 
-        tax_rule_group_id = tax_rule_group and tax_rule_group[0]['id_tax_rules_group']['value']
+        tax_rule_group_id = self._get_cached(('carrier_tax_rules_group', carrier_id), load)
 
         return self._get_taxes_by_tax_rule(tax_rule_group_id, country_id, state_id, postcode)
 
+    def _get_tax_rules(self, tax_rule_group_id):
+        """All tax rules of the tax rules group, sorted like PrestaShop TaxRulesTaxManager does"""
+        def load():
+            tax_rules = self._client.model('tax_rule').search_read(
+                filters={'id_tax_rules_group': tax_rule_group_id},
+                fields=[
+                    'id', 'id_country', 'id_state', 'zipcode_from', 'zipcode_to',
+                    'id_tax', 'behavior',
+                ],
+                skip_translation=True,
+            )
+            return sorted(
+                tax_rules,
+                key=lambda x: (x['zipcode_from'], x['zipcode_to'], int(x['id_state'] or 0)),
+                reverse=True,
+            )
+
+        return self._get_cached(('tax_rules', tax_rule_group_id), load)
+
     def _get_taxes_by_tax_rule(self, tax_rule_group_id, country_id, state_id, postcode):
         # Based on https://github.com/
         #     PrestaShop/PrestaShop/blob/develop/classes/tax/TaxRulesTaxManager.php#L74
@@ -1153,25 +1342,14 @@ class PrestaShopApiClient(AbsApiClient):
                 or tax_rule_group_id == IS_FALSE or country_id == IS_FALSE:
             return tax_ids, behavior
 
-        tax_rules = self._client.get(
-            'tax_rules',
-            options={
-                'filter[id_country]': f'[{country_id}]',
-                'filter[id_state]': f'[0|{state_id}]',
-                'filter[id_tax_rules_group]': f'[{tax_rule_group_id}]',
-                'display': '[id,id_state,zipcode_from,zipcode_to,id_tax,behavior]',
-                'sort': '[zipcode_from_DESC,zipcode_to_DESC,id_state_DESC]',
-            }
-        )
-
-        tax_rules = tax_rules['tax_rules'] and tax_rules['tax_rules']['tax_rule']
+        tax_rules = [
+            x for x in self._get_tax_rules(tax_rule_group_id)
+            if x['id_country'] == str(country_id) and x['id_state'] in (IS_FALSE, str(state_id))
+        ]
 
         if not tax_rules:
             return tax_ids, behavior
 
-        if isinstance(tax_rules, dict):
-            tax_rules = [tax_rules]
-
         tax_rules = list(
             filter(
                 lambda x: (x['zipcode_from'] <= postcode <= x['zipcode_to'])
@@ -1192,23 +1370,12 @@ class PrestaShopApiClient(AbsApiClient):
 
         return tax_ids, behavior
 
-    def _get_payment_transactions(self, order_ref):
-        payments = self._client.model('order_payment').search_read(
-            filters={'order_reference': order_ref},
-            fields=['amount', 'transaction_id', 'date_add', 'id_currency', 'payment_method'],
-        )
-
+    def _prepare_payment_transactions(self, order_ref, payments):
         payment_transactions = []
 
         for payment in payments:
             if payment['transaction_id']:
-                presta_currency = self._client.model('currency').search_read(
-                    filters={
-                        'id': payment['id_currency'],
-                    },
-                    fields=['iso_code'],
-                )
-                currency = presta_currency and presta_currency[0] or dict()
+                currency = self._get_currency(payment['id_currency'])
                 transaction_vals = {
                     'transaction_id': '%s (%s): %s' % (order_ref,
                                                        payment['payment_method'],
@@ -1239,13 +1406,7 @@ class PrestaShopApiClient(AbsApiClient):
         if not isinstance(order_rows, list):
             order_rows = [order_rows]
 
-        presta_currency = self._client.model('currency').search_read(
-            filters={
-                'id': order['id_currency'],
-            },
-            fields=['iso_code'],
-        )
-        currency = presta_currency and presta_currency[0] or dict()
+        currency = self._get_currency(order['id_currency'])
 
         carrier_tax_ids, carrier_tax_behavior = self._get_carrier_tax_ids(
             order['id_carrier'],
@@ -1254,7 +1415,7 @@ class PrestaShopApiClient(AbsApiClient):
             delivery_address.get('postcode'),
         )
         wrapping_tax_ids, wrapping_tax_behavior = self._get_taxes_by_tax_rule(
-            self.get_configuration('PS_GIFT_WRAPPING_TAX_RULES_GROUP'),
+            self._get_cached_configuration_value('PS_GIFT_WRAPPING_TAX_RULES_GROUP'),
             delivery_address.get('id_country'),
             delivery_address.get('id_state'),
             delivery_address.get('postcode'),
@@ -1387,17 +1548,47 @@ class PrestaShopApiClient(AbsApiClient):
             return ''
 
     def export_inventory(self, inventory):
+        stocks = self._get_stock_available_map(
+            [x.split('-')[0] for x in inventory.keys()]
+        )
+
         for product_combination_id, inventory_item in inventory.items():
-            product_id, combination_id = product_combination_id.split('-')
+            stock_records = stocks.get(product_combination_id)
 
-            # find stock for combination
-            stock = self._client.model('stock_available').search({
-                'id_product': product_id,
-                'id_product_attribute': combination_id,
-            })
+            if not stock_records:
+                _logger.warning(
+                    'PrestaShop: stock for product "%s" was not found, quantity is not exported',
+                    product_combination_id,
+                )
+                continue
 
-            stock.quantity = int(inventory_item['qty'])
-            stock.save()
+            for stock in stock_records:
+                self._save_stock_quantity(stock, int(inventory_item['qty']))
+
+    def _get_stock_available_map(self, product_ids):
+        """
+        Read `stock_available` records of all the products in a few requests and
+        return dictionary {'product_id-combination_id': [stock_available, ...]}
+        """
+        stocks = defaultdict(list)
+
+        for stock in self._search_read_by_values(
+            'stock_available',
+            'id_product',
+            product_ids,
+            fields=['id'] + STOCK_AVAILABLE_REQUIRED_FIELDS,
+        ):
+            key = '%s-%s' % (stock['id_product'], stock['id_product_attribute'])
+            stocks[key].append(stock)
+
+        return stocks
+
+    def _save_stock_quantity(self, stock, quantity):
+        # Send only the required fields, so PrestaShop does not need the full schema
+        stock_available = self._client.model('stock_available').get(stock['id'])
+        return stock_available._save({
+            stock_available._name: dict(stock, quantity=quantity),
+        })
 
     def export_tracking(self, sale_order_id, tracking_data_list):
         tracking = ', '.join(set([x['tracking'] for x in tracking_data_list]))
@@ -1504,7 +1695,7 @@ class PrestaShopApiClient(AbsApiClient):
         self._import_template_custom_field_hook(presta_template, template)
 
         images_hub = {
-            'images': dict(),  # 'images': {'image_id': bin-data,}
+            'images': dict(),  # 'images': {'image_id': file-path,}
             'variants': dict(),  # variants: {'variant_id': [image-ids],}
         }
         variants = []
@@ -1572,23 +1763,45 @@ class PrestaShopApiClient(AbsApiClient):
             if not isinstance(image_list_tmpl, list):
                 image_list_tmpl = [image_list_tmpl]
 
-            image_ids = [image['id'] for image in image_list_tmpl]
-            bearer_url = f'{self._client._api_url}images/products/{product_code}'
-
-            for image_id in image_ids:
-                if not image_id or image_id == IS_FALSE:
-                    continue
+            image_ids = [
+                image['id'] for image in image_list_tmpl
+                if image['id'] and image['id'] != IS_FALSE
+            ]
 
-                try:
-                    response = self._client._execute(f'{bearer_url}/{image_id}', 'GET')
-                except PrestaShopWebServiceError:
-                    pass
-                else:
-                    if response.status_code == 200:
-                        images_hub['images'][image_id] = response.content
+            images_hub['tmp_dir'] = tempfile.TemporaryDirectory(prefix='presta_images_')
+            images_hub['images'] = self._download_product_images(
+                product_code,
+                image_ids,
+                images_hub['tmp_dir'].name,
+            )
 
         return template, variants, bom_components, images_hub
 
+    def _download_product_images(self, product_code, image_ids, directory):
+        """
+        Download images in parallel straight to the files of the directory.
+        Returns dictionary {image_id: file_path} in the original order of images.
+        """
+        bearer_url = f'{self._client._api_url}images/products/{product_code}'
+
+        def download(image_id):
+            file_path = os.path.join(directory, image_id)
+            try:
+                downloaded = self._client.download(f'{bearer_url}/{image_id}', file_path)
+            except PrestaShopWebServiceError:
+                downloaded = False
+
+            return image_id, downloaded and file_path
+
+        concurrency = min(IMAGE_DOWNLOAD_CONCURRENCY, len(image_ids))
+        if concurrency <= 1:
+            results = [download(x) for x in image_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(download, image_ids))
+
+        return {image_id: file_path for image_id, file_path in results if file_path}
+
     def _get_product_fields_hook(self, fields):
         # This method exists to extend amount of fields that are retrieved
         # from Prestashop API. So additional logic can be added
@@ -1631,36 +1844,64 @@ class PrestaShopApiClient(AbsApiClient):
         return templates
 
     def _get_products_and_variants(self, product_fields, combination_fields, product_filter):
+        template_ids, variant_ids = [], []
+
+        for model_name, records in self._iter_products_and_variants(
+            product_fields,
+            combination_fields,
+            product_filter,
+        ):
+            if model_name == 'product':
+                template_ids += records
+            else:
+                variant_ids += records
+
+        return template_ids, variant_ids
+
+    def _iter_products_and_variants(self, product_fields, combination_fields, product_filter):
+        """
+        Yield pages of templates and then pages of their variants as they are received:
+            ('product', [{'id': '1', ...}, ...]),
+            ...
+            ('combination', [{'id': '7', 'id_product': '1', ...}, ...]),
+            ...
+        Only ids of the templates are kept between pages.
+        """
+        active_template_ids = set()
 
-        template_ids = self._client.model('product').search_read_by_blocks(
+        template_pages = self._client.model('product').iter_search_read_by_blocks(
             filters=self._get_product_filter_hook(product_filter),
             fields=self._get_product_fields_hook(product_fields),
         )
 
-        template_ids = self._filter_templates_hook(template_ids)
-
-        active_template_ids = [x['id'] for x in template_ids]
+        for templates in template_pages:
+            templates = self._filter_templates_hook(templates)
+            active_template_ids.update(x['id'] for x in templates)
+            yield 'product', templates
 
-        variant_ids = self._client.model('combination').search_read_by_blocks(
+        variant_pages = self._client.model('combination').iter_search_read_by_blocks(
             filters=self._get_combination_filter_hook(product_filter),
             fields=self._get_combination_fields_hook(combination_fields),
         )
 
-        # If we were searching by some criteria we have to double check now if found combinations
-        # correspond to product template search criteria (usually it is {'active': 1})
-        if product_filter and variant_ids:
-            tmpl_ids_filter = {'id': '[%s]' % '|'.join([x['id_product'] for x in variant_ids])}
-            active_templates = self._client.model('product').search_read(
-                filters=self._get_product_filter_hook(tmpl_ids_filter),
-                fields=self._get_product_fields_hook(['id']),
-            )
-            active_templates = self._filter_templates_hook(active_templates)
-            # create list of ids
-            active_template_ids = [x['id'] for x in active_templates]
+        for variants in variant_pages:
+            page_template_ids = active_template_ids
 
-        variant_ids = [x for x in variant_ids if x['id_product'] in active_template_ids]
+            # If we were searching by some criteria we have to double check now if found
+            # combinations correspond to product template search criteria
+            # (usually it is {'active': 1})
+            if product_filter:
+                tmpl_ids_filter = {
+                    'id': '[%s]' % '|'.join(set(x['id_product'] for x in variants)),
+                }
+                active_templates = self._client.model('product').search_read(
+                    filters=self._get_product_filter_hook(tmpl_ids_filter),
+                    fields=self._get_product_fields_hook(['id']),
+                )
+                active_templates = self._filter_templates_hook(active_templates)
+                page_template_ids = {x['id'] for x in active_templates}
 
-        return template_ids, variant_ids
+            yield 'combination', [x for x in variants if x['id_product'] in page_template_ids]
 
     def get_templates_and_products_for_validation_test(self, product_refs=None):
         """Presta allows different references for for template and its single variant."""
@@ -1690,20 +1931,23 @@ class PrestaShopApiClient(AbsApiClient):
 
         product_fields = ['id', 'ean13', 'reference']
         combination_fields = ['id', 'id_product', 'reference', 'ean13']
-        template_ids, variant_ids = self._get_products_and_variants(product_fields,
-                                                                    combination_fields,
-                                                                    reference_filter_mixin)
 
         products_data = defaultdict(list)
-        for tmpl in template_ids:
-            products_data[tmpl['id']].append(
-                serialize_template(tmpl)
-            )
-
-        for variant in variant_ids:
-            products_data[variant['id_product']].append(
-                serialize_variant(variant)
-            )
+        for model_name, records in self._iter_products_and_variants(
+            product_fields,
+            combination_fields,
+            reference_filter_mixin,
+        ):
+            if model_name == 'product':
+                for tmpl in records:
+                    products_data[tmpl['id']].append(
+                        serialize_template(tmpl)
+                    )
+            else:
+                for variant in records:
+                    products_data[variant['id_product']].append(
+                        serialize_variant(variant)
+                    )
 
         # If there is at least one variant, template reference is not essential.
         for product_list in products_data.values():
@@ -1752,17 +1996,23 @@ class PrestaShopApiClient(AbsApiClient):
         return external_data, template_router
 
     def get_stock_levels(self):
-        stock_available = self._client.model('stock_available').search_read_by_blocks(
+        stock_levels = {}
+        for stock_levels_block in self.iter_stock_levels():
+            stock_levels.update(stock_levels_block)
+
+        return stock_levels
+
+    def iter_stock_levels(self):
+        stock_available_pages = self._client.model('stock_available').iter_search_read_by_blocks(
             filters=None,
             fields=['id_product', 'id_product_attribute', 'quantity'],
         )
 
-        stock_available = {
-            x['id_product'] + '-' + x['id_product_attribute']: x['quantity']
-            for x in stock_available
-        }
-
-        return stock_available
+        for stock_available in stock_available_pages:
+            yield {
+                x['id_product'] + '-' + x['id_product_attribute']: x['quantity']
+                for x in stock_available
+            }
 
     def _parse_accessory_ids(self, template):
         accessories = template.get('associations', {}).get('accessories', {}).get('product', [])
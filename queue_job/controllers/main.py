@@ -6,6 +6,7 @@ import logging
 import random
 import time
 import traceback
+from contextlib import contextmanager
 from io import StringIO
 
 from psycopg2 import OperationalError, errorcodes
@@ -16,7 +17,7 @@ from odoo.service.model import PG_CONCURRENCY_ERRORS_TO_RETRY
 
 from ..delay import chain, group
 from ..exception import FailedJobError, NothingToDoJob, RetryableJobError
-from ..job import ENQUEUED, Job
+from ..job import ENQUEUED, PENDING, Job
 
 _logger = logging.getLogger(__name__)
 
@@ -24,6 +25,12 @@ PG_RETRY = 5  # seconds
 
 DEPENDS_MAX_TRIES_ON_CONCURRENCY_FAILURE = 5
 
+# batched jobs are committed by chunks of this size
+BATCH_COMMIT_SIZE = 10
+# seconds, no batched job is started after this delay (or after half of
+# ``limit_time_real``) from the start of the request
+BATCH_TIME_LIMIT = 60
+
 
 class RunJobController(http.Controller):
     def _try_perform_job(self, env, job):
@@ -73,6 +80,11 @@ class RunJobController(http.Controller):
     def runjob(self, db, job_uuid, **kw):
         http.request.session.db = db
         env = http.request.env(user=SUPERUSER_ID)
+        return self._runjob(env, job_uuid)
+
+    def _runjob(self, env, job_uuid, skip_locked=False):
+        """Run the enqueued job, ``skip_locked`` skips a job claimed by another worker"""
+        started_at = time.monotonic()
 
         def retry_postpone(job, message, seconds=None):
             job.env.clear()
@@ -83,10 +95,17 @@ class RunJobController(http.Controller):
                 job.store()
 
         # ensure the job to run is in the correct state and lock the record
-        env.cr.execute(
-            "SELECT state FROM queue_job WHERE uuid=%s AND state=%s FOR UPDATE",
-            (job_uuid, ENQUEUED),
-        )
+        if skip_locked:
+            env.cr.execute(
+                "SELECT state FROM queue_job WHERE uuid=%s AND state=%s "
+                "FOR UPDATE SKIP LOCKED",
+                (job_uuid, ENQUEUED),
+            )
+        else:
+            env.cr.execute(
+                "SELECT state FROM queue_job WHERE uuid=%s AND state=%s FOR UPDATE",
+                (job_uuid, ENQUEUED),
+            )
         if not env.cr.fetchone():
             _logger.warning(
                 "was requested to run job %s, but it does not exist, "
@@ -149,8 +168,142 @@ class RunJobController(http.Controller):
         self._enqueue_dependent_jobs(env, job)
         _logger.debug("%s enqueue depends done", job)
 
+        self._perform_batch(env, job, started_at=started_at)
+
         return ""
 
+    def _claim_batch(self, env, job, limit):
+        """Lock up to ``limit`` pending jobs of the same function as ``job``
+
+        Jobs with an eta in the future are claimed only when they are delayed
+        by the ``batch_wait`` of the function: never performed yet and their
+        eta is within ``batch_wait`` of their creation (stored datetimes are
+        truncated to the second). Scheduled and postponed jobs wait for their
+        eta.
+        """
+        job_config = job.job_config
+        env.cr.execute(
+            "SELECT uuid FROM queue_job "
+            "WHERE state=%s AND channel_method_name=%s AND channel=%s "
+            "AND graph_uuid IS NULL AND uuid!=%s "
+            "AND (eta IS NULL OR eta <= now() at time zone 'utc' "
+            "     OR (retry = 0 AND eta <= date_created + %s * interval '1 second')) "
+            "ORDER BY priority, date_created, id "
+            "LIMIT %s "
+            "FOR UPDATE SKIP LOCKED",
+            (
+                PENDING,
+                job.job_function_name,
+                job.channel,
+                job.uuid,
+                job_config.batch_wait + 1 if job_config.batch_wait else 0,
+                limit,
+            ),
+        )
+        return [row[0] for row in env.cr.fetchall()]
+
+    def _perform_batch(self, env, job, started_at=None):
+        """Perform the pending jobs of the same function as ``job``
+
+        Every job is performed in its own savepoint and keeps its own state:
+        a failing or postponed job does not prevent the others to be done.
+        The jobs are committed by chunks of ``BATCH_COMMIT_SIZE`` and no job
+        is started once the time limit is reached, the jobs claimed but not
+        performed stay pending.
+        """
+        remaining = job.job_config.batch_size - 1
+        deadline = (started_at or time.monotonic()) + self._batch_time_limit()
+        performed = 0
+        while remaining > 0 and time.monotonic() < deadline:
+            limit = min(remaining, BATCH_COMMIT_SIZE)
+            uuids = self._claim_batch(env, job, limit)
+            for job_uuid in uuids:
+                if time.monotonic() >= deadline:
+                    break
+                self._perform_batch_job(env, Job.load(env, job_uuid))
+                performed += 1
+            if uuids:
+                env.flush_all()
+                env.cr.commit()
+            remaining -= limit
+            if len(uuids) < limit:
+                break
+        if performed:
+            _logger.debug("%s performed %d batched jobs", job, performed)
+
+    @staticmethod
+    def _batch_time_limit():
+        limit_time_real = tools.config["limit_time_real"]
+        if limit_time_real and limit_time_real > 0:
+            return min(BATCH_TIME_LIMIT, limit_time_real / 2)
+        return BATCH_TIME_LIMIT
+
+    def _perform_batch_job(self, env, batch_job):
+        try:
+            with self._batch_job_savepoint(env):
+                batch_job.set_started()
+                batch_job.perform()
+                batch_job.set_done()
+                batch_job.store()
+                env.flush_all()
+        except NothingToDoJob as err:
+            msg = str(err) or _("Job interrupted and set to Done: nothing to do.")
+            batch_job.set_done(msg)
+            batch_job.store()
+        except RetryableJobError as err:
+            batch_job.postpone(result=str(err), seconds=err.seconds)
+            batch_job.set_pending(reset_retry=False)
+            batch_job.store()
+        except OperationalError as err:
+            if err.pgcode not in PG_CONCURRENCY_ERRORS_TO_RETRY:
+                self._set_batch_job_failed(batch_job, err)
+            else:
+                msg = tools.ustr(err.pgerror, errors="replace")
+                batch_job.postpone(result=msg, seconds=PG_RETRY)
+                batch_job.set_pending(reset_retry=False)
+                batch_job.store()
+        except (FailedJobError, Exception) as orig_exception:
+            self._set_batch_job_failed(batch_job, orig_exception)
+
+    @contextmanager
+    def _batch_job_savepoint(self, env):
+        """Savepoint also discarding the hooks registered by a job rolled back
+
+        Otherwise the commit hooks of a failed job would still run when the
+        other jobs are committed, and the state it kept on the transaction
+        would outlive it.
+        """
+        cr = env.cr
+        # run the pending precommit hooks first, they are not the job's ones
+        cr.flush()
+        callbacks = [
+            (callback, list(callback._funcs), dict(callback.data))
+            for callback in (cr.precommit, cr.postcommit, cr.postrollback)
+        ]
+        transaction_attrs = dict(vars(cr.transaction))
+        try:
+            with cr.savepoint():
+                yield
+        except Exception:
+            for callback, funcs, data in callbacks:
+                callback._funcs.clear()
+                callback._funcs.extend(funcs)
+                callback.data.clear()
+                callback.data.update(data)
+            for name in vars(cr.transaction).keys() - transaction_attrs.keys():
+                delattr(cr.transaction, name)
+            for name, value in transaction_attrs.items():
+                if value is None:
+                    setattr(cr.transaction, name, None)
+            raise
+
+    def _set_batch_job_failed(self, job, orig_exception):
+        traceback_txt = traceback.format_exc()
+        _logger.error(traceback_txt)
+        vals = self._get_failure_values(job, traceback_txt, orig_exception)
+        job.set_failed(**vals)
+        job.store()
+
     def _get_failure_values(self, job, traceback_txt, orig_exception):
         """Collect relevant data from exception."""
         exception_name = orig_exception.__class__.__name__
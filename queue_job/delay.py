@@ -545,6 +545,10 @@ class Delayable:
             channel=self.channel,
             identity_key=self.identity_key,
         )
+        job_config = self._generated_job.job_config
+        if self.eta is None and job_config.batch_size > 1 and job_config.batch_wait:
+            # let the other jobs of the function come to be batched together
+            self._generated_job.eta = job_config.batch_wait
         return self._generated_job
 
     def _store_args(self, *args, **kwargs):
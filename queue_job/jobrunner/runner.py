@@ -35,6 +35,13 @@ How to use it?
     or ``False`` if unset.
   - ``ODOO_QUEUE_JOB_JOBRUNNER_DB_PORT=5432``, default ``db_port``
     or ``False`` if unset.
+  - ``ODOO_QUEUE_JOB_DISPATCH_WORKERS=8``, number of jobs the runner
+    asks Odoo to run concurrently, default 8.
+  - ``ODOO_QUEUE_JOB_DISPATCH_MODE=inprocess``, run the jobs in the
+    threads of the runner process instead of asking the Odoo HTTP workers,
+    default ``http``. Every job gets ``limit_time_cpu`` seconds of CPU time
+    of the runner process from its start (shared with the jobs running
+    meanwhile), ``limit_time_real`` and the memory limits do not apply.
 
 * Alternatively, configure the channels through the Odoo configuration
   file, like:
@@ -50,6 +57,8 @@ How to use it?
   http_auth_password = s3cr3t
   jobrunner_db_host = master-db
   jobrunner_db_port = 5432
+  dispatch_workers = 8
+  dispatch_mode = http
 
 * Or, if using ``anybox.recipe.odoo``, add this to your buildout configuration:
 
@@ -133,9 +142,12 @@ Caveat
        of running Odoo is obviously not for production purposes.
 """
 
+import abc
 import datetime
 import logging
 import os
+import queue
+import resource
 import select
 import threading
 import time
@@ -144,6 +156,7 @@ from contextlib import closing, contextmanager
 import psycopg2
 import requests
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from requests.adapters import HTTPAdapter
 
 import odoo
 from odoo.tools import config
@@ -153,6 +166,13 @@ from .channels import ENQUEUED, NOT_DONE, PENDING, ChannelManager
 
 SELECT_TIMEOUT = 60
 ERROR_RECOVERY_DELAY = 5
+DISPATCH_WORKERS = 8
+DISPATCH_TIMEOUT = 1
+DISPATCH_STATS_INTERVAL = 300
+NOTIFY_BATCH_SIZE = 1000
+SLOW_TICK_DURATION = 1
+# seconds before retrying to enqueue a job locked by a worker
+LOCKED_JOB_RETRY_DELAY = 5
 
 _logger = logging.getLogger(__name__)
 
@@ -198,57 +218,273 @@ def _connection_info_for(db_name):
     return connection_info
 
 
-def _async_http_get(scheme, host, port, user, password, db_name, job_uuid):
+def _dispatch_mode():
+    return (
+        os.environ.get("ODOO_QUEUE_JOB_DISPATCH_MODE")
+        or queue_job_config.get("dispatch_mode")
+        or "http"
+    )
+
+
+def _dispatch_workers():
+    return int(
+        os.environ.get("ODOO_QUEUE_JOB_DISPATCH_WORKERS")
+        or queue_job_config.get("dispatch_workers")
+        or DISPATCH_WORKERS
+    )
+
+
+def _set_job_pending(db_name, job_uuid):
     # Method to set failed job (due to timeout, etc) as pending,
     # to avoid keeping it as enqueued.
-    def set_job_pending():
-        connection_info = _connection_info_for(db_name)
-        conn = psycopg2.connect(**connection_info)
-        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        with closing(conn.cursor()) as cr:
-            cr.execute(
-                "UPDATE queue_job SET state=%s, "
-                "date_enqueued=NULL, date_started=NULL "
-                "WHERE uuid=%s and state=%s "
-                "RETURNING uuid",
-                (PENDING, job_uuid, ENQUEUED),
+    connection_info = _connection_info_for(db_name)
+    conn = psycopg2.connect(**connection_info)
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with closing(conn), closing(conn.cursor()) as cr:
+        cr.execute(
+            "UPDATE queue_job SET state=%s, "
+            "date_enqueued=NULL, date_started=NULL "
+            "WHERE uuid=%s and state=%s "
+            "RETURNING uuid",
+            (PENDING, job_uuid, ENQUEUED),
+        )
+        if cr.fetchone():
+            _logger.warning(
+                "state of job %s was reset from %s to %s",
+                job_uuid,
+                ENQUEUED,
+                PENDING,
             )
-            if cr.fetchone():
-                _logger.warning(
-                    "state of job %s was reset from %s to %s",
-                    job_uuid,
-                    ENQUEUED,
-                    PENDING,
-                )
 
-    # TODO: better way to HTTP GET asynchronously (grequest, ...)?
-    #       if this was python3 I would be doing this with
-    #       asyncio, aiohttp and aiopg
-    def urlopen():
+
+class DispatchStats(object):
+    """Statistics of the dispatched jobs
+
+    >>> stats = DispatchStats()
+    >>> stats.add(0.2)
+    >>> stats.add(1.0, timeout=True)
+    >>> stats.add(0.1, failure=True)
+    >>> stats.to_dict()['dispatched'], stats.to_dict()['failures']
+    (3, 1)
+    >>> stats.to_dict()['latency_max']
+    1.0
+    """
+
+    def __init__(self):
+        self.dispatched = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def add(self, latency, timeout=False, failure=False):
+        self.dispatched += 1
+        self.timeouts += int(timeout)
+        self.failures += int(failure)
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def to_dict(self):
+        return {
+            "dispatched": self.dispatched,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "latency_avg": round(self.latency_sum / (self.dispatched or 1), 3),
+            "latency_max": round(self.latency_max, 3),
+        }
+
+
+class Dispatcher(abc.ABC):
+    """Fixed pool of threads running the jobs
+
+    At most ``workers`` dispatches are in flight, the runner must check
+    ``free_slots()`` before dispatching jobs. ``on_release`` is called (from
+    the dispatching thread) every time a dispatch is done.
+    """
+
+    def __init__(self, workers=DISPATCH_WORKERS, on_release=None):
+        self.workers = workers
+        self.on_release = on_release
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = DispatchStats()
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name="queue_job_dispatcher_%s" % index
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for __ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(DISPATCH_TIMEOUT * 2)
+        self._threads = []
+
+    def free_slots(self):
+        with self._lock:
+            return max(self.workers - self._in_flight, 0)
+
+    def dispatch(self, db_name, job_uuid):
+        with self._lock:
+            self._in_flight += 1
+        self._queue.put((db_name, job_uuid, time.monotonic()))
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats.to_dict(), in_flight=self._in_flight)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            db_name, job_uuid, dispatched_at = item
+            timeout = failure = False
+            try:
+                timeout = self._run(db_name, job_uuid)
+            except Exception:
+                failure = True
+                _set_job_pending(db_name, job_uuid)
+            finally:
+                latency = time.monotonic() - dispatched_at
+                with self._lock:
+                    self.stats.add(latency, timeout=timeout, failure=failure)
+                    self._in_flight -= 1
+                if self.on_release:
+                    self.on_release()
+
+    @abc.abstractmethod
+    def _run(self, db_name, job_uuid):
+        """Run the job, return True if it was not waited for until its end"""
+
+
+class HttpDispatcher(Dispatcher):
+    """Dispatcher asking Odoo to run the jobs through HTTP requests
+
+    All the threads share one keep-alive HTTP session.
+    """
+
+    def __init__(
+        self,
+        scheme,
+        host,
+        port,
+        user=None,
+        password=None,
+        workers=DISPATCH_WORKERS,
+        on_release=None,
+    ):
+        super().__init__(workers=workers, on_release=on_release)
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.session = requests.Session()
+        if user:
+            self.session.auth = (user, password)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def stop(self):
+        super().stop()
+        self.session.close()
+
+    def _run(self, db_name, job_uuid):
         url = "{}://{}:{}/queue_job/runjob?db={}&job_uuid={}".format(
-            scheme, host, port, db_name, job_uuid
+            self.scheme, self.host, self.port, db_name, job_uuid
         )
         try:
-            auth = None
-            if user:
-                auth = (user, password)
             # we are not interested in the result, so we set a short timeout
             # but not too short so we trap and log hard configuration errors
-            response = requests.get(url, timeout=1, auth=auth)
+            response = self.session.get(url, timeout=DISPATCH_TIMEOUT)
 
             # raise_for_status will result in either nothing, a Client Error
             # for HTTP Response codes between 400 and 500 or a Server Error
             # for codes between 500 and 600
             response.raise_for_status()
-        except requests.Timeout:
-            set_job_pending()
+        except requests.ReadTimeout:
+            # the job is running longer than the timeout: it is expected,
+            # the job stays enqueued only if Odoo did not start it
+            _set_job_pending(db_name, job_uuid)
+            return True
         except Exception:
             _logger.exception("exception in GET %s", url)
-            set_job_pending()
+            raise
+        return False
+
+
+class InProcessDispatcher(Dispatcher):
+    """Dispatcher running the jobs in the threads of the runner process
 
-    thread = threading.Thread(target=urlopen)
-    thread.daemon = True
-    thread.start()
+    There is no HTTP request: every thread claims its job with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` and performs it with its own cursor,
+    so the jobs do not compete with the UI traffic for the HTTP workers.
+    """
+
+    def stop(self):
+        # the jobs not started yet go back to pending, so they are not left
+        # enqueued
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            db_name, job_uuid, __ = item
+            _set_job_pending(db_name, job_uuid)
+            with self._lock:
+                self._in_flight -= 1
+        # wait for the running jobs: the threads must not outlive the
+        # dispatcher, neither on shutdown nor when the runner is restarted
+        for __ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _reset_cpu_limit(self):
+        """Give the job ``limit_time_cpu`` from now, like Odoo on every request
+
+        The runner worker never returns from ``process_work()``, so the limit
+        set by Odoo would otherwise be a budget for all the jobs together.
+        """
+        if not (odoo.multi_process and config["limit_time_cpu"]):
+            return
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + config["limit_time_cpu"]
+        __, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+    def _run(self, db_name, job_uuid):
+        # imported here, the controllers need the Odoo server to be loaded
+        from ..controllers.main import RunJobController
+
+        threading.current_thread().dbname = db_name
+        self._reset_cpu_limit()
+        try:
+            registry = odoo.registry(db_name).check_signaling()
+            try:
+                with registry.cursor() as cr:
+                    env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+                    RunJobController()._runjob(env, job_uuid, skip_locked=True)
+            except Exception:
+                # like odoo.service.model.retrying, registry and cache
+                # invalidations of the failed job are not signaled
+                registry.reset_changes()
+                raise
+            registry.signal_changes()
+        except Exception:
+            _logger.exception("exception running job %s on db %s", job_uuid, db_name)
+            raise
+        return False
 
 
 class Database(object):
@@ -326,14 +562,26 @@ class Database(object):
             cr.execute(query)
 
     def set_job_enqueued(self, uuid):
+        self.set_jobs_enqueued([uuid])
+
+    def set_jobs_enqueued(self, uuids):
+        """Enqueue the pending jobs, return the uuids of the enqueued ones
+
+        Jobs locked by a worker (performed in a batch of jobs) are skipped.
+        """
         with closing(self.conn.cursor()) as cr:
             cr.execute(
                 "UPDATE queue_job SET state=%s, "
                 "date_enqueued=date_trunc('seconds', "
                 "                         now() at time zone 'utc') "
-                "WHERE uuid=%s",
-                (ENQUEUED, uuid),
+                "WHERE id IN ("
+                "    SELECT id FROM queue_job "
+                "    WHERE uuid = ANY(%s) AND state=%s "
+                "    FOR UPDATE SKIP LOCKED"
+                ") RETURNING uuid",
+                (ENQUEUED, list(uuids), PENDING),
             )
+            return {row[0] for row in cr.fetchall()}
 
 
 class QueueJobRunner(object):
@@ -358,6 +606,25 @@ class QueueJobRunner(object):
         self.db_by_name = {}
         self._stop = False
         self._stop_pipe = os.pipe()
+        self._wakeup_pipe = os.pipe()
+        os.set_blocking(self._wakeup_pipe[0], False)
+        self._dispatch_backlog = False
+        self._stats_logged_at = time.monotonic()
+        if _dispatch_mode() == "inprocess":
+            self.dispatcher = InProcessDispatcher(
+                workers=_dispatch_workers(),
+                on_release=self._on_dispatch_released,
+            )
+        else:
+            self.dispatcher = HttpDispatcher(
+                scheme,
+                host,
+                port,
+                user=user,
+                password=password,
+                workers=_dispatch_workers(),
+                on_release=self._on_dispatch_released,
+            )
 
     @classmethod
     def from_environ_or_config(cls):
@@ -418,22 +685,70 @@ class QueueJobRunner(object):
 
     def run_jobs(self):
         now = _odoo_now()
-        for job in self.channel_manager.get_jobs_to_run(now):
-            if self._stop:
+        jobs = self.channel_manager.get_jobs_to_run(now)
+        # jobs are taken from the channels only while the dispatcher has
+        # capacity, the others are kept in the channels queues
+        jobs_by_db = {}
+        # set before checking, so a dispatch released meanwhile wakes us up
+        self._dispatch_backlog = True
+        free_slots = self.dispatcher.free_slots()
+        while not self._stop and free_slots:
+            job = next(jobs, None)
+            if job is None:
+                self._dispatch_backlog = False
                 break
-            _logger.info("asking Odoo to run job %s on db %s", job.uuid, job.db_name)
-            self.db_by_name[job.db_name].set_job_enqueued(job.uuid)
-            _async_http_get(
-                self.scheme,
-                self.host,
-                self.port,
-                self.user,
-                self.password,
-                job.db_name,
-                job.uuid,
+            jobs_by_db.setdefault(job.db_name, []).append(job)
+            free_slots -= 1
+
+        count = 0
+        for db_name, db_jobs in jobs_by_db.items():
+            db = self.db_by_name[db_name]
+            # one statement per database, before asking Odoo to run the jobs
+            enqueued = db.set_jobs_enqueued([job.uuid for job in db_jobs])
+            skipped = [job.uuid for job in db_jobs if job.uuid not in enqueued]
+            if skipped:
+                self._release_locked_jobs(db, skipped)
+            db_jobs = [job for job in db_jobs if job.uuid in enqueued]
+            for job in db_jobs:
+                _logger.info("asking Odoo to run job %s on db %s", job.uuid, db_name)
+                self.dispatcher.dispatch(db_name, job.uuid)
+            count += len(db_jobs)
+        return count
+
+    def tick(self):
+        started_at = time.monotonic()
+        notified = self.process_notifications()
+        dispatched = self.run_jobs()
+        duration = time.monotonic() - started_at
+        if notified or dispatched:
+            log = _logger.info if duration > SLOW_TICK_DURATION else _logger.debug
+            log(
+                "tick processed %s notifications and dispatched %s jobs in %.3fs",
+                notified,
+                dispatched,
+                duration,
+            )
+
+    def _on_dispatch_released(self):
+        if self._dispatch_backlog:
+            # wakeup the select() in wait_notification to dispatch pending jobs
+            os.write(self._wakeup_pipe[1], b".")
+
+    def _log_dispatch_stats(self):
+        if time.monotonic() - self._stats_logged_at < DISPATCH_STATS_INTERVAL:
+            return
+        self._stats_logged_at = time.monotonic()
+        stats = self.dispatcher.get_stats()
+        if stats["dispatched"]:
+            _logger.info(
+                "dispatched %(dispatched)s jobs (%(timeouts)s timeouts, "
+                "%(failures)s failures, %(in_flight)s in flight), "
+                "latency avg %(latency_avg)ss max %(latency_max)ss",
+                stats,
             )
 
     def process_notifications(self):
+        count = 0
         for db in self.db_by_name.values():
             if not db.conn.notifies:
                 # If there are no activity in the queue_job table it seems that
@@ -441,17 +756,46 @@ class QueueJobRunner(object):
                 # causing some intermediaries (such as haproxy) to close the
                 # connection, making the jobrunner to restart on a socket error
                 db.keep_alive()
-            while db.conn.notifies:
-                if self._stop:
-                    break
-                notification = db.conn.notifies.pop()
-                uuid = notification.payload
-                with db.select_jobs("uuid = %s", (uuid,)) as cr:
-                    job_datas = cr.fetchone()
-                    if job_datas:
-                        self.channel_manager.notify(db.db_name, *job_datas)
-                    else:
-                        self.channel_manager.remove_job(uuid)
+            while db.conn.notifies and not self._stop:
+                # drain the notifications and resolve them by batches
+                uuids = {}
+                while db.conn.notifies and len(uuids) < NOTIFY_BATCH_SIZE:
+                    uuids[db.conn.notifies.pop().payload] = True
+                count += len(uuids)
+                self._process_notified_jobs(db, list(uuids))
+        return count
+
+    def _release_locked_jobs(self, db, uuids):
+        """Give back to the channels the jobs which could not be enqueued
+
+        They are locked by a worker (performed in a batch of jobs), which
+        may roll back without any notification. Their current state is
+        read again and the jobs still pending are retried after a delay.
+        """
+        retry_eta = _odoo_now() + LOCKED_JOB_RETRY_DELAY
+        found = set()
+        with db.select_jobs("uuid = ANY(%s)", (uuids,)) as cr:
+            for job_datas in cr:
+                found.add(job_datas[1])
+                channel, uuid, seq, date_created, priority, eta, state = job_datas
+                if state == PENDING:
+                    eta = max(eta or 0, retry_eta)
+                self.channel_manager.notify(
+                    db.db_name, channel, uuid, seq, date_created, priority, eta, state
+                )
+        for uuid in uuids:
+            if uuid not in found:
+                self.channel_manager.remove_job(uuid)
+
+    def _process_notified_jobs(self, db, uuids):
+        found = set()
+        with db.select_jobs("uuid = ANY(%s)", (uuids,)) as cr:
+            for job_datas in cr:
+                found.add(job_datas[1])
+                self.channel_manager.notify(db.db_name, *job_datas)
+        for uuid in uuids:
+            if uuid not in found:
+                self.channel_manager.remove_job(uuid)
 
     def wait_notification(self):
         for db in self.db_by_name.values():
@@ -462,6 +806,7 @@ class QueueJobRunner(object):
         # we'll select() on database connections and the stop pipe
         conns = [db.conn for db in self.db_by_name.values()]
         conns.append(self._stop_pipe[0])
+        conns.append(self._wakeup_pipe[0])
         # look if the channels specify a wakeup time
         wakeup_time = self.channel_manager.get_wakeup_time()
         if not wakeup_time:
@@ -482,7 +827,17 @@ class QueueJobRunner(object):
             conns, _, _ = select.select(conns, [], [], timeout)
             if conns and not self._stop:
                 for conn in conns:
-                    conn.poll()
+                    if conn == self._wakeup_pipe[0]:
+                        self._drain_wakeup_pipe()
+                    else:
+                        conn.poll()
+
+    def _drain_wakeup_pipe(self):
+        try:
+            while os.read(self._wakeup_pipe[0], 1024):
+                pass
+        except BlockingIOError:
+            pass
 
     def stop(self):
         _logger.info("graceful stop requested")
@@ -492,6 +847,7 @@ class QueueJobRunner(object):
 
     def run(self):
         _logger.info("starting")
+        self.dispatcher.start()
         while not self._stop:
             # outer loop does exception recovery
             try:
@@ -502,8 +858,8 @@ class QueueJobRunner(object):
                 _logger.info("database connections ready")
                 # inner loop does the normal processing
                 while not self._stop:
-                    self.process_notifications()
-                    self.run_jobs()
+                    self.tick()
+                    self._log_dispatch_stats()
                     self.wait_notification()
             except KeyboardInterrupt:
                 self.stop()
@@ -517,4 +873,5 @@ class QueueJobRunner(object):
                 self.close_databases()
                 time.sleep(ERROR_RECOVERY_DELAY)
         self.close_databases(remove_jobs=False)
+        self.dispatcher.stop()
         _logger.info("stopped")
@@ -79,7 +79,11 @@ class QueueJobChannel(models.Model):
                 and ("name" in values or "parent_id" in values)
             ):
                 raise exceptions.UserError(_("Cannot change the root channel"))
-        return super().write(values)
+        res = super().write(values)
+        if "name" in values or "parent_id" in values:
+            # the cached job configs contain the complete names of the channels
+            self.env["queue.job.function"].clear_caches()
+        return res
 
     def unlink(self):
         for channel in self:
@@ -28,7 +28,10 @@ class QueueJobFunction(models.Model):
         "related_action_enable "
         "related_action_func_name "
         "related_action_kwargs "
-        "job_function_id ",
+        "job_function_id "
+        "batch_size "
+        "batch_wait ",
+        defaults=(1, 0),
     )
 
     def _default_channel(self):
@@ -79,6 +82,18 @@ class QueueJobFunction(models.Model):
         "enable, func_name, kwargs.\n"
         "See the module description for details.",
     )
+    batch_size = fields.Integer(
+        default=1,
+        help="Maximum number of pending jobs of this function performed "
+        "together in one transaction. Every job keeps its own state and "
+        "result, a failing job does not prevent the others to be done. "
+        "1 disables the batching.",
+    )
+    batch_wait = fields.Integer(
+        string="Batch Wait (seconds)",
+        help="Maximum time a new job waits for other jobs of this function to "
+        "be batched with. Only used when the batch size is greater than 1.",
+    )
 
     @api.depends("model_id.model", "method")
     def _compute_name(self):
@@ -182,6 +197,8 @@ class QueueJobFunction(models.Model):
             related_action_func_name=config.related_action.get("func_name"),
             related_action_kwargs=config.related_action.get("kwargs", {}),
             job_function_id=config.id,
+            batch_size=config.batch_size or 1,
+            batch_wait=config.batch_wait,
         )
 
     def _retry_pattern_format_error_message(self):
@@ -207,6 +224,17 @@ class QueueJobFunction(models.Model):
                         record._retry_pattern_format_error_message()
                     ) from ex
 
+    @api.constrains("batch_size", "batch_wait")
+    def _check_batch(self):
+        for record in self:
+            if record.batch_size < 1 or record.batch_wait < 0:
+                raise exceptions.UserError(
+                    _(
+                        "Batch Size of {} must be at least 1 and "
+                        "Batch Wait can't be negative."
+                    ).format(record.name)
+                )
+
     def _related_action_format_error_message(self):
         return _(
             "Unexpected format of Related Action for {}.\n"
@@ -4,5 +4,6 @@ from . import test_delayable
 from . import test_json_field
 from . import test_model_job_channel
 from . import test_model_job_function
+from . import test_run_job_batch
 from . import test_queue_job_protected_write
 from . import test_wizards
@@ -55,3 +55,56 @@ class TestJobFunction(common.TransactionCase):
                 job_function_id=job_function.id,
             ),
         )
+
+    def test_function_job_config_batch(self):
+        self.env["queue.job.function"].create(
+            {
+                "model_id": self.env.ref("base.model_res_users").id,
+                "method": "read",
+                "batch_size": 50,
+                "batch_wait": 10,
+            }
+        )
+        config = self.env["queue.job.function"].job_config("<res.users>.read")
+        self.assertEqual(config.batch_size, 50)
+        self.assertEqual(config.batch_wait, 10)
+
+    def test_function_job_config_batch_invalid(self):
+        with self.assertRaises(exceptions.UserError):
+            self.env["queue.job.function"].create(
+                {
+                    "model_id": self.env.ref("base.model_res_users").id,
+                    "method": "read",
+                    "batch_size": 0,
+                }
+            )
+
+    def test_function_job_config_cache_cleared(self):
+        job_function = self.env["queue.job.function"].create(
+            {"model_id": self.env.ref("base.model_res_users").id, "method": "read"}
+        )
+        job_config = self.env["queue.job.function"].job_config
+        self.assertEqual(job_config("<res.users>.read").batch_size, 1)
+
+        job_function.batch_size = 20
+        self.assertEqual(job_config("<res.users>.read").batch_size, 20)
+
+        job_function.unlink()
+        self.assertIsNone(job_config("<res.users>.read").job_function_id)
+
+    def test_function_job_config_channel_renamed(self):
+        channel = self.env["queue.job.channel"].create(
+            {"name": "foo", "parent_id": self.env.ref("queue_job.channel_root").id}
+        )
+        self.env["queue.job.function"].create(
+            {
+                "model_id": self.env.ref("base.model_res_users").id,
+                "method": "read",
+                "channel_id": channel.id,
+            }
+        )
+        job_config = self.env["queue.job.function"].job_config
+        self.assertEqual(job_config("<res.users>.read").channel, "root.foo")
+
+        channel.name = "bar"
+        self.assertEqual(job_config("<res.users>.read").channel, "root.bar")
@@ -0,0 +1,139 @@
+# license lgpl-3.0 or later (http://www.gnu.org/licenses/lgpl.html)
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+from odoo import exceptions
+from odoo.tests import common
+
+from odoo.addons.queue_job.controllers import main
+from odoo.addons.queue_job.controllers.main import RunJobController
+from odoo.addons.queue_job.exception import RetryableJobError
+from odoo.addons.queue_job.job import DONE, FAILED, PENDING, Job
+
+original_perform = Job.perform
+
+
+def failed_job_hook():
+    pass
+
+
+def perform(job):
+    # the name written by the job tells how it ends
+    name = job.args[0]["name"]
+    result = original_perform(job)
+    if name == "fail":
+        job.env.cr.postcommit.add(failed_job_hook)
+        raise exceptions.UserError("Failed")
+    if name == "retry":
+        raise RetryableJobError("Later", seconds=60)
+    return result
+
+
+class TestRunJobBatch(common.TransactionCase):
+    def setUp(self):
+        super().setUp()
+        self.env["queue.job.function"].create(
+            {
+                "model_id": self.env.ref("base.model_res_partner").id,
+                "method": "write",
+                "batch_size": 10,
+            }
+        )
+        self.partners = self.env["res.partner"].create(
+            [{"name": "Partner %s" % index} for index in range(4)]
+        )
+
+    def _delay_write(self, partner, name, **properties):
+        delayed = partner.with_delay(**properties).write({"name": name})
+        return Job.load(self.env, delayed.uuid)
+
+    def _perform_batch(self, job):
+        with mock.patch.object(
+            Job, "perform", autospec=True, side_effect=perform
+        ), mock.patch.object(self.env.cr, "commit") as commit:
+            RunJobController()._perform_batch(self.env, job)
+        self.env.invalidate_all()
+        return commit
+
+    def test_perform_batch(self):
+        leader = self._delay_write(self.partners[0], "leader")
+        done = self._delay_write(self.partners[1], "done")
+        failed = self._delay_write(self.partners[2], "fail")
+        postponed = self._delay_write(self.partners[3], "retry")
+
+        commit = self._perform_batch(leader)
+
+        self.assertEqual(commit.call_count, 1)
+        # the leader is performed by the caller
+        self.assertEqual(leader.db_record().state, PENDING)
+        self.assertEqual(done.db_record().state, DONE)
+        self.assertEqual(self.partners[1].name, "done")
+        self.assertEqual(failed.db_record().state, FAILED)
+        self.assertEqual(postponed.db_record().state, PENDING)
+        self.assertTrue(postponed.db_record().eta)
+        # the failed and postponed jobs are rolled back to their savepoint
+        self.assertEqual(self.partners[2].name, "Partner 2")
+        self.assertEqual(self.partners[3].name, "Partner 3")
+        self.assertNotIn(failed_job_hook, self.env.cr.postcommit._funcs)
+
+    def test_perform_batch_commit_chunks(self):
+        leader = self._delay_write(self.partners[0], "leader")
+        jobs = [
+            self._delay_write(partner, "done %s" % index)
+            for index, partner in enumerate(self.partners[1:])
+        ]
+
+        with mock.patch.object(main, "BATCH_COMMIT_SIZE", 2):
+            commit = self._perform_batch(leader)
+
+        self.assertEqual(commit.call_count, 2)
+        for job in jobs:
+            self.assertEqual(job.db_record().state, DONE)
+
+    def test_perform_batch_time_limit(self):
+        leader = self._delay_write(self.partners[0], "leader")
+        pending = self._delay_write(self.partners[1], "pending")
+
+        with mock.patch.object(main, "BATCH_TIME_LIMIT", 0):
+            commit = self._perform_batch(leader)
+
+        self.assertFalse(commit.called)
+        self.assertEqual(pending.db_record().state, PENDING)
+        self.assertEqual(self.partners[1].name, "Partner 1")
+
+    def test_perform_batch_eta(self):
+        leader = self._delay_write(self.partners[0], "leader")
+        scheduled = self._delay_write(
+            self.partners[1], "scheduled", eta=datetime.now() + timedelta(hours=1)
+        )
+        ready = self._delay_write(
+            self.partners[2], "ready", eta=datetime.now() - timedelta(hours=1)
+        )
+
+        self._perform_batch(leader)
+
+        self.assertEqual(scheduled.db_record().state, PENDING)
+        self.assertEqual(self.partners[1].name, "Partner 1")
+        self.assertEqual(ready.db_record().state, DONE)
+        self.assertEqual(self.partners[2].name, "ready")
+
+    def test_perform_batch_wait(self):
+        self.env["queue.job.function"].search(
+            [("name", "=", "<res.partner>.write")]
+        ).batch_wait = 30
+        leader = self._delay_write(self.partners[0], "leader")
+        waiting = self._delay_write(self.partners[1], "waiting")
+        self.assertTrue(waiting.eta)
+
+        self._perform_batch(leader)
+
+        self.assertEqual(waiting.db_record().state, DONE)
+        self.assertEqual(self.partners[1].name, "waiting")
+
+    def test_perform_batch_nothing_to_claim(self):
+        leader = self._delay_write(self.partners[0], "leader")
+
+        commit = self._perform_batch(leader)
+
+        self.assertFalse(commit.called)